@@ -0,0 +1,85 @@
+"""baseline schema
+
+Tables as created by Base.metadata.create_all before migrations existed
+(users, brokerage_connections, holdings). Existing databases without an
+alembic_version table are stamped at this revision; everything added since
+has its own revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 19:57:28.351597
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+
+    op.create_table('brokerage_connections',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('provider', sa.String(), nullable=True),
+    sa.Column('access_token', sa.String(), nullable=True),
+    sa.Column('refresh_token', sa.String(), nullable=True),
+    sa.Column('is_connected', sa.Boolean(), nullable=True),
+    sa.Column('connected_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    with op.batch_alter_table('brokerage_connections', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_brokerage_connections_id'), ['id'], unique=False)
+
+    op.create_table('holdings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('avg_cost', sa.Float(), nullable=False),
+    sa.Column('sector', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('holdings', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_holdings_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_holdings_symbol'), ['symbol'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('holdings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_holdings_symbol'))
+        batch_op.drop_index(batch_op.f('ix_holdings_id'))
+
+    op.drop_table('holdings')
+    with op.batch_alter_table('brokerage_connections', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_brokerage_connections_id'))
+
+    op.drop_table('brokerage_connections')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
@@ -0,0 +1,70 @@
+"""holdings per-user indexes
+
+Adds a unique (user_id, symbol) index and a covering index for valuation
+reads. Duplicate (user_id, symbol) rows left by the old delete-and-insert
+sync (e.g. one symbol held in two accounts) are merged into the oldest
+row first: quantities summed and avg_cost cost-weighted, as
+merge_statement_holdings does for new imports.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 20:05:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _merge_duplicate_holdings() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT h.id, h.user_id, h.symbol, h.quantity, h.avg_cost FROM holdings h "
+        "JOIN (SELECT user_id, symbol FROM holdings GROUP BY user_id, symbol HAVING COUNT(*) > 1) d "
+        "ON h.user_id = d.user_id AND h.symbol = d.symbol "
+        "ORDER BY h.user_id, h.symbol, h.id"
+    )).all()
+
+    kept = {}
+    drop = []
+    for row in rows:
+        key = (row.user_id, row.symbol)
+        merged = kept.get(key)
+        if merged is None:
+            kept[key] = {"id": row.id, "quantity": row.quantity, "avg_cost": row.avg_cost}
+            continue
+        total_quantity = merged["quantity"] + row.quantity
+        if total_quantity > 0:
+            merged["avg_cost"] = round(
+                (merged["quantity"] * merged["avg_cost"] + row.quantity * row.avg_cost) / total_quantity, 2
+            )
+        merged["quantity"] = total_quantity
+        drop.append({"id": row.id})
+
+    if kept:
+        bind.execute(
+            sa.text("UPDATE holdings SET quantity = :quantity, avg_cost = :avg_cost WHERE id = :id"),
+            list(kept.values()),
+        )
+    if drop:
+        bind.execute(sa.text("DELETE FROM holdings WHERE id = :id"), drop)
+
+
+def upgrade() -> None:
+    _merge_duplicate_holdings()
+    op.create_index('uq_holdings_user_symbol', 'holdings', ['user_id', 'symbol'], unique=True)
+    op.create_index(
+        'ix_holdings_user_valuation', 'holdings',
+        ['user_id', 'symbol', 'quantity', 'avg_cost', 'sector'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_holdings_user_valuation', table_name='holdings')
+    op.drop_index('uq_holdings_user_symbol', table_name='holdings')
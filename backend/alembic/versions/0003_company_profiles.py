@@ -0,0 +1,32 @@
+"""company profiles
+
+Long-lived per-symbol name and market cap used to enrich quotes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 20:30:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('company_profiles',
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('market_cap', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('company_profiles')
@@ -0,0 +1,56 @@
+"""price history tables
+
+Raw quote ticks (quote_snapshots) and 1m/1h/1d OHLC bars (price_rollups).
+Databases that got these from an earlier, wider 0001 already have them,
+so each table is only created when missing.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 21:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'price_rollups' not in tables:
+        op.create_table('price_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('resolution', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('open', sa.Float(), nullable=False),
+        sa.Column('high', sa.Float(), nullable=False),
+        sa.Column('low', sa.Float(), nullable=False),
+        sa.Column('close', sa.Float(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'resolution', 'bucket_start', name='uq_price_rollups_bucket')
+        )
+    if 'quote_snapshots' not in tables:
+        op.create_table('quote_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('captured_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('quote_snapshots', schema=None) as batch_op:
+            batch_op.create_index('ix_quote_snapshots_symbol_captured_at', ['symbol', 'captured_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('quote_snapshots', schema=None) as batch_op:
+        batch_op.drop_index('ix_quote_snapshots_symbol_captured_at')
+
+    op.drop_table('quote_snapshots')
+    op.drop_table('price_rollups')
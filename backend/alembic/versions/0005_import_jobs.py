@@ -0,0 +1,47 @@
+"""import jobs
+
+Background statement import jobs. Databases that got this table from an
+earlier, wider 0001 already have it, so it is only created when missing.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 21:00:01.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if 'import_jobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('import_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total_files', sa.Integer(), nullable=False),
+    sa.Column('processed_files', sa.Integer(), nullable=False),
+    sa.Column('failed_files', sa.Integer(), nullable=False),
+    sa.Column('holdings_count', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_jobs_user_id'), ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_jobs_user_id'))
+
+    op.drop_table('import_jobs')
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from app.schemas.admin import QuoteCacheStats
+from app.services.auth_service import get_current_admin_user
+from app.services.quote_cache import quote_cache
+
+router = APIRouter()
+
+@router.get("/cache/quotes", response_model=QuoteCacheStats)
+def get_quote_cache_stats(current_user = Depends(get_current_admin_user)):
+    return quote_cache.stats()
@@ -1,37 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import get_async_db, get_async_read_db
+from app.schemas import ImportJob
 from app.services.auth_service import get_current_active_user
+from app.services.import_service import import_service
 from app.services.pdf_service import pdf_service
 
 router = APIRouter()
+settings = get_settings()
 
 @router.post("/import/pdf")
-def import_from_pdf(
+async def import_from_pdf(
+    files: List[UploadFile] = File(None),
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Import portfolio from PDF statement
-    connection = pdf_service.connect_account(db, current_user.id)
-    # Auto-sync holdings on import
-    pdf_service.sync_holdings(db, current_user.id)
-    return {"status": "connected", "provider": "pdf_import"}
+    connection = await pdf_service.connect_account(db, current_user.id)
+
+    if not files:
+        # No upload: fall back to the bundled statement
+        await pdf_service.sync_holdings(db, current_user.id)
+        return {"status": "connected", "provider": "pdf_import"}
+
+    if len(files) > settings.IMPORT_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.IMPORT_MAX_FILES} statements per import")
+    for upload in files:
+        if not (upload.filename or "").lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"{upload.filename} is not a PDF")
+
+    # Parsing happens in the background; poll the job for progress
+    job = await import_service.create_job(db, current_user.id, files)
+    return {"status": "connected", "provider": "pdf_import", "job_id": job.id}
+
+@router.get("/import/jobs/{job_id}", response_model=ImportJob)
+async def get_import_job(
+    job_id: str,
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await import_service.get_job(db, current_user.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
 
 @router.delete("/disconnect")
-def disconnect_brokerage(
+async def disconnect_brokerage(
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = pdf_service.disconnect_account(db, current_user.id)
+    success = await pdf_service.disconnect_account(db, current_user.id)
     if not success:
         raise HTTPException(status_code=400, detail="No active connection found")
     return {"status": "disconnected"}
 
 @router.get("/status")
-def get_connection_status(
+async def get_connection_status(
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    if current_user.brokerage_connection and current_user.brokerage_connection.is_connected:
-        return {"connected": True, "provider": current_user.brokerage_connection.provider}
+    connection = await pdf_service.get_connection(db, current_user.id)
+    if connection and connection.is_connected:
+        return {"connected": True, "provider": connection.provider}
     return {"connected": False}
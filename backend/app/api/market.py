@@ -1,54 +1,113 @@
-from typing import List
-from fastapi import APIRouter, Query
-from app.schemas.market import StockQuote
-import random
+import hashlib
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.config import get_settings
+from app.schemas.market import QuoteBatch, StockQuote
+from app.services.auth_service import get_current_active_user, get_current_active_user_or_query_token
+from app.services.market_service import market_service
+from app.services.quote_cache import quote_cache
+from app.services.quote_stream import quote_stream_hub
+
+settings = get_settings()
 
 router = APIRouter()
 
+def _parse_symbols(symbols: str) -> List[str]:
+    return list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+
 @router.get("/quotes", response_model=List[StockQuote])
-async def get_quotes(symbols: str = Query(..., description="Comma separated list of symbols")):
-    symbol_list = [s.strip() for s in symbols.split(",")]
-    quotes = []
-    
-    # Mock data generator
-    for sym in symbol_list:
-        base_price = random.uniform(50, 500)
-        change_pct = random.uniform(-5, 5)
-        week52_low = base_price * 0.7
-        week52_high = base_price * 1.3
-        
-        quotes.append({
-            "symbol": sym.upper(),
-            "name": f"{sym.upper()} Corp",
-            "price": round(base_price, 2),
-            "change_percent": round(change_pct, 2),
-            "week52_low": round(week52_low, 2),
-            "week52_high": round(week52_high, 2),
-            "buy_score": random.randint(10, 95),
-            "market_cap": f"{random.randint(10, 2000)}B",
-            "volume": f"{random.randint(1, 50)}M"
-        })
-        
-    return quotes
+async def get_quotes(
+    symbols: str = Query(..., description="Comma separated list of symbols"),
+    current_user = Depends(get_current_active_user),
+):
+    return await market_service.get_quotes(_parse_symbols(symbols))
 
 @router.get("/quote", response_model=StockQuote)
-async def get_quote(symbol: str = Query(..., description="Stock symbol")):
-    # Reuse the logic from get_quotes for consistency
-    quotes = await get_quotes(symbols=symbol)
-    if quotes:
-        return quotes[0]
-    
-    # Fallback if something goes wrong (shouldn't happen with current mock logic)
-    import random
-    base_price = random.uniform(50, 500)
-    return {
-        "symbol": symbol.upper(),
-        "name": f"{symbol.upper()} Corp",
-        "price": round(base_price, 2),
-        "change_percent": round(random.uniform(-5, 5), 2),
-        "week52_low": round(base_price * 0.7, 2),
-        "week52_high": round(base_price * 1.3, 2),
-        "buy_score": random.randint(10, 95),
-        "market_cap": f"{random.randint(10, 2000)}B",
-        "volume": f"{random.randint(1, 50)}M"
+async def get_quote(
+    symbol: str = Query(..., description="Stock symbol"),
+    current_user = Depends(get_current_active_user),
+):
+    if not symbol.strip():
+        raise HTTPException(status_code=400, detail="Symbol is required")
+    return await market_service.get_quote(symbol.strip())
+
+@router.get("/quotes/bulk", response_model=QuoteBatch)
+async def get_quotes_bulk(
+    request: Request,
+    symbols: str = Query(..., description="Comma separated list of symbols"),
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Quotes for up to QUOTE_BULK_MAX_SYMBOLS symbols, served from the quote
+    cache only so a large request never spends upstream quota. Uncached
+    symbols are listed in `errors` and queued for the background refresher;
+    a later request picks them up. The response carries an ETag
+    and a Cache-Control max-age of the shortest remaining quote TTL, so
+    browsers can reuse it or revalidate with If-None-Match for a 304.
+    """
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(symbol_list) > settings.QUOTE_BULK_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUOTE_BULK_MAX_SYMBOLS} symbols per request"
+        )
+
+    batch = market_service.get_cached_quotes(symbol_list)
+    body = batch.model_dump_json().encode()
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    # Mock quotes and failures aren't cached, so the batch is only as fresh as its stalest quote
+    max_age = int(min((quote_cache.fresh_for(s) if s in batch.quotes else 0.0) for s in symbol_list))
+    headers = {
+        "ETag": etag,
+        # private: the endpoint needs a login, so shared caches mustn't serve it to others
+        "Cache-Control": f"private, max-age={max_age}" if max_age > 0 else "no-cache",
     }
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison, as If-None-Match requires
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+@router.get("/stream")
+async def stream_quotes(
+    symbols: str = Query(..., description="Comma separated list of symbols"),
+    current_user = Depends(get_current_active_user_or_query_token),
+):
+    """
+    Server-Sent Events stream of quote updates.
+    Sends a `snapshot` event with full quotes, then `delta` events carrying
+    only the symbols and fields that changed since the last push. Needs a
+    login like the other quote endpoints; since EventSource can't send an
+    Authorization header, the token may also be passed as `?token=`.
+    """
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(symbol_list) > settings.QUOTE_STREAM_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUOTE_STREAM_MAX_SYMBOLS} symbols per stream"
+        )
+
+    async def event_source():
+        async for event in quote_stream_hub.subscribe(symbol_list):
+            if event["type"] == "heartbeat":
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event['quotes'], separators=(',', ':'))}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
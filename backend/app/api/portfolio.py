@@ -1,48 +1,66 @@
+import asyncio
 from typing import List
 from fastapi import APIRouter
 from app.schemas.portfolio import Holding, PortfolioSummary
 from app.services.pdf_service import pdf_service
 from app.services.market_service import market_service
+from app.services.portfolio_aggregator import portfolio_aggregator
+from app.services.price_history_service import price_history_service
+from app.services.valuation_service import valuation_service
 from datetime import datetime
 
 router = APIRouter()
 
+# The statement-backed portfolio isn't tied to a login yet
+PORTFOLIO_USER_ID = 1
+
+async def _value_portfolio():
+    source = pdf_service.statement_fingerprint()
+    
+    # Get base holdings from PDF service (hardcoded list from statement);
+    # a cache miss runs pdfium/pdfplumber, so keep it off the event loop
+    base_holdings = await asyncio.to_thread(pdf_service.parse_pdf_holdings)
+    
+    # Fetch all quotes in one concurrent batch; symbols that fail fall back to cost
+    quotes = (await market_service.get_quotes_batch([item["symbol"] for item in base_holdings])).quotes
+    
+    valuation = valuation_service.value_holdings(base_holdings, quotes)
+    # Re-seed running totals so later price ticks apply to current holdings
+    portfolio_aggregator.load(PORTFOLIO_USER_ID, valuation, source=source)
+    return base_holdings, quotes, valuation
+
 @router.get("", response_model=List[Holding])
 async def get_portfolio():
-    # Get base holdings from PDF service (hardcoded list from statement)
-    base_holdings = pdf_service.parse_pdf_holdings()
+    base_holdings, quotes, valuation = await _value_portfolio()
+    
+    # Convert the computed columns back to Python floats once, not per cell
+    current_prices = valuation.price.tolist()
+    market_values = valuation.market_value.tolist()
+    unrealized_pls = valuation.unrealized_pl.tolist()
+    unrealized_pl_percents = valuation.unrealized_pl_percent.tolist()
+    now = datetime.now()
     
     holdings_response = []
     
     for idx, item in enumerate(base_holdings):
-        symbol = item["symbol"]
-        quantity = item["quantity"]
-        avg_cost = item["avg_cost"]
-        
-        # Get market data
-        quote = await market_service.get_quote(symbol)
-        
-        current_price = quote.price if quote else avg_cost
-        market_value = quantity * current_price
-        unrealized_pl = market_value - (quantity * avg_cost)
-        unrealized_pl_percent = (unrealized_pl / (quantity * avg_cost)) * 100 if avg_cost > 0 else 0
+        quote = quotes.get(item["symbol"])
         
         holding = Holding(
             id=idx + 1,
-            user_id=1,
-            symbol=symbol,
+            user_id=PORTFOLIO_USER_ID,
+            symbol=item["symbol"],
             name=item["name"],
-            quantity=quantity,
-            avg_cost=avg_cost,
-            current_price=current_price,
-            market_value=market_value,
-            unrealized_pl=unrealized_pl,
-            unrealized_pl_percent=unrealized_pl_percent,
+            quantity=item["quantity"],
+            avg_cost=item["avg_cost"],
+            current_price=current_prices[idx],
+            market_value=market_values[idx],
+            unrealized_pl=unrealized_pls[idx],
+            unrealized_pl_percent=unrealized_pl_percents[idx],
             sector=item["sector"],
             week52_low=quote.week52_low if quote else 0,
             week52_high=quote.week52_high if quote else 0,
             buy_score=quote.buy_score if quote else 50,
-            updated_at=datetime.now()
+            updated_at=now
         )
         holdings_response.append(holding)
         
@@ -50,33 +68,37 @@ async def get_portfolio():
 
 @router.get("/summary", response_model=PortfolioSummary)
 async def get_portfolio_summary():
-    # Calculate summary based on real holdings
-    holdings = await get_portfolio()
+    # Running totals are kept current by price ticks; only value from scratch
+    # when they haven't been seeded yet or the statement changed
+    summary = portfolio_aggregator.summary(PORTFOLIO_USER_ID, source=pdf_service.statement_fingerprint())
+    if summary is None:
+        _, _, valuation = await _value_portfolio()
+        summary = {
+            "total_value": valuation.total_value,
+            "total_pl": valuation.total_pl,
+            "total_pl_percent": valuation.total_pl_percent,
+            "sector_allocation": valuation.sector_allocation(),
+        }
     
-    total_value = sum(h.market_value for h in holdings)
-    total_cost = sum(h.quantity * h.avg_cost for h in holdings)
-    total_pl = total_value - total_cost
-    total_pl_percent = (total_pl / total_cost) * 100 if total_cost > 0 else 0
+    total_value = summary["total_value"]
+    total_pl = summary["total_pl"]
+    total_pl_percent = summary["total_pl_percent"]
     
-    # Mock trend data based on total value
-    import random
-    trend_data = [
-        total_value * (1 - random.uniform(0.01, 0.05)) for _ in range(6)
-    ] + [total_value]
+    # Last 7 daily values from the 1d price rollups, ending with today's live value
+    trend_data = await price_history_service.portfolio_trend(
+        portfolio_aggregator.positions(PORTFOLIO_USER_ID), total_value, days=7
+    )
+    weekly_change_value = total_value - trend_data[0]
+    weekly_change_percent = (weekly_change_value / trend_data[0]) * 100 if trend_data[0] > 0 else 0
     
     return {
         "total_value": total_value,
-        "weekly_change_value": total_pl * 0.1, # Mock weekly change
-        "weekly_change_percent": total_pl_percent * 0.1,
+        "weekly_change_value": weekly_change_value,
+        "weekly_change_percent": weekly_change_percent,
         "trend_data": trend_data,
         "total_pl": total_pl,
         "total_pl_percent": total_pl_percent,
-        "sector_allocation": {
-            "Technology": 60.0,
-            "Consumer Cyclical": 20.0,
-            "Healthcare": 10.0,
-            "Other": 10.0
-        }
+        "sector_allocation": summary["sector_allocation"]
     }
 
 @router.post("/sync", response_model=List[Holding])
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional, Tuple
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Investment Dashboard"
@@ -7,11 +8,82 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api"
     
     DATABASE_URL: str = "sqlite:///./investment.db"
+    DATABASE_READ_REPLICA_URL: Optional[str] = None  # Read-only routes use this when set
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Below typical server/proxy idle timeouts
+    DB_POOL_PRE_PING: bool = True
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL; FULL fsyncs every commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_EMAILS: List[str] = []  # Users allowed on /api/admin
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0  # 0 disables the cache
+    AUTH_PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are upgraded on login when this changes
+    PASSWORD_HASH_WORKERS: int = 4  # Concurrent bcrypt operations
     
     FINNHUB_API_KEY: str = ""
+    FINNHUB_TIMEOUT_SECONDS: float = 10.0
+    FINNHUB_KEEPALIVE_SECONDS: float = 30.0
+    FINNHUB_RATE_LIMIT_PER_MINUTE: int = 60  # Free tier quota
+    FINNHUB_RATE_LIMIT_BURST: int = 10
+    FINNHUB_MAX_RETRIES: int = 2
+    FINNHUB_RATE_LIMIT_MAX_WAIT_SECONDS: float = 30.0  # Longest a call queues for quota before failing
+    QUOTE_FETCH_CONCURRENCY: int = 8
+    QUOTE_CACHE_MAXSIZE: int = 5000
+    QUOTE_CACHE_TTL_SECONDS: int = 60  # Equities during market hours
+    QUOTE_CACHE_ETF_TTL_SECONDS: int = 180  # ETFs during market hours
+    QUOTE_CACHE_AFTER_HOURS_TTL_SECONDS: int = 900
+    QUOTE_STALE_TTL_SECONDS: int = 300  # How long an expired quote may still be served while refreshing
+    PRICE_REFRESH_ENABLED: bool = True  # Background quote refresh; profiles are refreshed either way
+    PRICE_REFRESH_INTERVAL_SECONDS: float = 30.0
+    PRICE_REFRESH_BATCH_SIZE: int = 50
+    PROFILE_REFRESH_INTERVAL_SECONDS: int = 86400  # Company name / market cap change rarely
+    PROFILE_REFRESH_BATCH_SIZE: int = 10  # Upstream profile fetches per refresh cycle, to leave quota for quotes
+    PROFILE_REFRESH_QUEUE_MAXSIZE: int = 1000  # Symbols waiting for a profile beyond the held ones
+    PRICE_HISTORY_FLUSH_INTERVAL_SECONDS: float = 30.0
+    PRICE_HISTORY_MAX_PENDING: int = 5000  # Buffered ticks that trigger an early flush
+    PRICE_HISTORY_RAW_RETENTION_DAYS: int = 2
+    PRICE_HISTORY_MINUTE_RETENTION_DAYS: int = 7
+    PRICE_HISTORY_HOURLY_RETENTION_DAYS: int = 90
+    PDF_PAGE_WORKERS: int = 4
+    PDF_PARALLEL_MIN_PAGES: int = 4  # Below this, page-level fan-out costs more than it saves
+    UPLOAD_DIR: str = "./uploads"
+    HOLDINGS_CACHE_DIR: str = "./holdings_cache"  # Parsed statement holdings, kept out of resources/
+    IMPORT_MAX_WORKERS: int = 4
+    IMPORT_MAX_FILES: int = 50
+    IMPORT_RETENTION_HOURS: float = 24.0  # Leftover uploads and stuck jobs older than this are cleaned up at startup
+    QUOTE_STREAM_INTERVAL_SECONDS: float = 5.0
+    QUOTE_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    QUOTE_STREAM_MAX_SYMBOLS: int = 200
+    QUOTE_BULK_MAX_SYMBOLS: int = 500  # Per /api/market/quotes/bulk request
+    QUOTE_REFRESH_QUEUE_MAXSIZE: int = 1000  # Uncached symbols queued for the background refresher
+    WEEK52_INDEX_MAXSIZE: int = 5000  # Symbols with a 52-week window held in memory
+    ETF_SYMBOLS: List[str] = [
+        "SPY", "QQQ", "VTI", "VOO", "IWM", "DIA", "SCHD",
+        "URA", "MRNY", "CONY", "TSLY", "BABO",
+    ]
+    INSIGHTS_UNIVERSE: List[str] = [
+        "AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META", "TSLA", "AMD", "AVGO", "ORCL",
+        "JPM", "BAC", "V", "MA", "PYPL", "SOFI", "LLY", "JNJ", "PFE", "MRK",
+        "UNH", "XOM", "CVX", "WMT", "TGT", "COST", "DIS", "NFLX", "T", "VZ",
+        "KO", "PEP", "MO", "MMM", "BA", "INTC", "PLTR", "IONQ", "BABA", "OKLO",
+    ]
+    INSIGHTS_UNIVERSE_FILE: Optional[str] = None  # One symbol per line; added to INSIGHTS_UNIVERSE
+    INSIGHTS_REFRESH_INTERVAL_SECONDS: float = 900.0
+    INSIGHTS_MIN_HISTORY_DAYS: int = 5  # Fewer daily bars than this and the 52-week range means little
+    INSIGHTS_INGEST_BATCH_SIZE: int = 50  # Universe quotes refreshed per cycle so bars build up for unheld symbols
+    INSIGHTS_OPPORTUNITY_MAX_POSITION: float = 0.2  # Position in the 52-week range, 0 = low, 1 = high
+    INSIGHTS_OVERHEATED_MIN_POSITION: float = 0.8
+    INSIGHTS_ZONE_LIMIT: int = 10  # Stocks listed per zone
+
+    # Buy score: weights of (52-week value, 3-month momentum, low volatility)
+    BUY_SCORE_WEIGHTS: Tuple[float, float, float] = (0.5, 0.3, 0.2)
 
     class Config:
         env_file = ".env"
@@ -1,27 +1,164 @@
-from sqlalchemy import create_engine
+import os
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import get_settings
+from app.config import Settings, get_settings
 
 settings = get_settings()
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-# check if sqlite is used
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Async drivers for the same database: aiosqlite for SQLite, asyncpg for Postgres
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    if driver is None:
+        return url
+    return f"{driver}{sep}{rest}"
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _engine_options(url: str, config: Settings) -> Dict[str, Any]:
+    if _is_sqlite(url):
+        # SQLite ignores pool sizing; check_same_thread only applies to the sync driver
+        return {"connect_args": {"check_same_thread": False}} if "+aiosqlite" not in url else {}
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": config.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+def _install_sqlite_pragmas(engine: Engine, config: Settings) -> None:
+    """
+    Per-connection SQLite tuning. WAL lets readers proceed while an import
+    writes, busy_timeout makes writers wait for the lock instead of failing
+    with "database is locked", and mmap serves reads from the page cache.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}",
+    ]
+    if config.SQLITE_WAL:
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: str, config: Optional[Settings] = None) -> Engine:
+    """Sync engine for `url` with pool and SQLite settings from `config`."""
+    config = config or settings
+    engine = create_engine(url, **_engine_options(url, config))
+    if _is_sqlite(url):
+        _install_sqlite_pragmas(engine, config)
+    return engine
+
+
+def create_async_db_engine(url: str, config: Optional[Settings] = None) -> AsyncEngine:
+    """Async counterpart of create_db_engine; `url` is mapped to the async driver."""
+    config = config or settings
+    url = async_database_url(url)
+    try:
+        engine = create_async_engine(url, **_engine_options(url, config))
+    except ModuleNotFoundError as e:
+        raise RuntimeError(
+            f"The async driver for {url.partition('://')[0]} is not installed ({e.name}); "
+            "install it from requirements.txt"
+        ) from e
+    if _is_sqlite(url):
+        _install_sqlite_pragmas(engine.sync_engine, config)
+    return engine
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers, so DB I/O never blocks the event loop.
+# The sync engine stays for migrations and code that already runs in threads.
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+
+# expire_on_commit=False: attributes can't lazy-load after commit on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Read-only traffic (GET routes, history queries) can go to a replica; without
+# one configured these are the primary engines
+if settings.DATABASE_READ_REPLICA_URL:
+    read_engine = create_db_engine(settings.DATABASE_READ_REPLICA_URL)
+    async_read_engine = create_async_db_engine(settings.DATABASE_READ_REPLICA_URL)
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+# Revision that matches the schema create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def run_migrations() -> None:
+    """
+    Upgrade the primary database to the latest Alembic revision. Databases
+    created by create_all before migrations existed are stamped at the
+    baseline first so their tables aren't created twice.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if "alembic_version" not in tables and "users" in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+        read_engine.dispose()
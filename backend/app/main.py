@@ -1,18 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
 
 settings = get_settings()
 
-from app.database import engine, Base
-from app.models import user, portfolio, brokerage
+from app.database import dispose_engines, run_migrations
+from app.models import user, portfolio, brokerage, price_history, import_job
 
-Base.metadata.create_all(bind=engine)
+from app.services.import_service import import_service
+from app.services.insights_service import insights_service
+from app.services.market_service import market_service
+from app.services.pdf_service import pdf_service
+from app.services.price_history_service import price_history_service
+from app.services.price_refresh_service import price_refresh_scheduler
+from app.services.quote_stream import quote_stream_hub
+from app.utils.security import shutdown_hash_executor
+
+run_migrations()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # App-scoped resources: opened once on startup, released on shutdown
+    await market_service.startup()
+    await import_service.startup()
+    price_history_service.start()
+    price_refresh_scheduler.start()
+    insights_service.start()
+    yield
+    await insights_service.stop()
+    await price_refresh_scheduler.stop()
+    await price_history_service.stop()
+    await import_service.shutdown()
+    pdf_service.shutdown()
+    shutdown_hash_executor()
+    await quote_stream_hub.aclose()
+    await market_service.aclose()
+    await dispose_engines()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set all CORS enabled origins
@@ -28,7 +58,7 @@ app.add_middleware(
 def root():
     return {"message": "Welcome to Investment Dashboard API"}
 
-from app.api import auth, portfolio, market, brokerage, recommendations, insights
+from app.api import auth, portfolio, market, brokerage, recommendations, insights, admin
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(brokerage.router, prefix="/api/brokerage", tags=["brokerage"])
@@ -36,3 +66,4 @@ app.include_router(portfolio.router, prefix="/api/portfolio", tags=["portfolio"]
 app.include_router(market.router, prefix="/api/market", tags=["market"])
 app.include_router(recommendations.router, prefix="/api/recommendations", tags=["recommendations"])
 app.include_router(insights.router, prefix="/api/insights", tags=["insights"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
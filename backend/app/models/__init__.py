@@ -1,3 +1,6 @@
 from .user import User
 from .portfolio import Holding
 from .brokerage import BrokerageConnection
+from .price_history import QuoteSnapshot, PriceRollup
+from .import_job import ImportJob
+from .company_profile import CompanyProfile
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Float, DateTime
+from app.database import Base
+
+class CompanyProfile(Base):
+    """Company name and market cap per symbol, refreshed from Finnhub about once a day."""
+    __tablename__ = "company_profiles"
+
+    symbol = Column(String, primary_key=True)
+    name = Column(String, nullable=True)  # NULL: Finnhub has no profile for the symbol
+    market_cap = Column(Float, nullable=True)  # USD
+    updated_at = Column(DateTime, nullable=False)  # UTC
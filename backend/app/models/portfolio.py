@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -16,3 +16,10 @@ class Holding(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
     user = relationship("User", back_populates="holdings")
+
+    __table_args__ = (
+        # One row per symbol per user; its user_id prefix serves every per-user lookup
+        Index("uq_holdings_user_symbol", "user_id", "symbol", unique=True),
+        # Covering index: valuation reads are answered from the index without touching the table
+        Index("ix_holdings_user_valuation", "user_id", "symbol", "quantity", "avg_cost", "sector"),
+    )
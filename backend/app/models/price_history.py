@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
+from app.database import Base
+
+class QuoteSnapshot(Base):
+    """Raw price tick, append-only. Pruned after PRICE_HISTORY_RAW_RETENTION_DAYS."""
+    __tablename__ = "quote_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    price = Column(Float, nullable=False)
+    captured_at = Column(DateTime, nullable=False)  # UTC
+
+    __table_args__ = (
+        Index("ix_quote_snapshots_symbol_captured_at", "symbol", "captured_at"),
+    )
+
+class PriceRollup(Base):
+    """OHLC bar per symbol per bucket at 1m, 1h or 1d resolution."""
+    __tablename__ = "price_rollups"
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    resolution = Column(String, nullable=False)  # "1m", "1h", "1d"
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    samples = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        UniqueConstraint("symbol", "resolution", "bucket_start", name="uq_price_rollups_bucket"),
+    )
@@ -1,4 +1,5 @@
 from .user import User, UserCreate, UserLogin, Token, TokenData
 from .portfolio import Holding, HoldingCreate, PortfolioSummary
-from .market import StockQuote
+from .market import StockQuote, QuoteBatch
 from .recommendations import Recommendation, RecommendationResponse
+from .brokerage import ImportJob
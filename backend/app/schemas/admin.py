@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+class QuoteCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    stale_hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    refreshes: int
+    refresh_errors: int
+    refresh_latency_avg_ms: float
+    refresh_latency_max_ms: float
+    market_hours: bool
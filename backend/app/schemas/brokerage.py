@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class ImportJob(BaseModel):
+    id: str
+    status: str
+    total_files: int
+    processed_files: int
+    failed_files: int
+    holdings_count: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
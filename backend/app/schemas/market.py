@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 
 class StockQuote(BaseModel):
     symbol: str
@@ -15,3 +15,6 @@ class StockQuote(BaseModel):
     change: Optional[float] = None
     volume: Optional[str] = None
 
+class QuoteBatch(BaseModel):
+    quotes: Dict[str, StockQuote] = {}
+    errors: Dict[str, str] = {}  # symbol -> reason the fetch failed
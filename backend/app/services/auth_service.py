@@ -1,38 +1,53 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
 from app.models import User
 from app.schemas import TokenData
 from app.config import get_settings
-from app.utils.security import verify_password, get_password_hash, create_access_token
+from app.services.principal_cache import principal_cache
+from app.utils.security import verify_and_update_password, get_password_hash, create_access_token
 from datetime import timedelta
 
 settings = get_settings()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        # Stored hash predates the configured bcrypt cost; upgrade it now we have the password
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
-def create_user(db: Session, email: str, password: str, full_name: str = None):
-    hashed_password = get_password_hash(password)
+async def create_user(db: AsyncSession, email: str, password: str, full_name: str = None):
+    hashed_password = await get_password_hash(password)
     db_user = User(email=email, hashed_password=hashed_password, full_name=full_name)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    # Repeat requests with the same token are a dictionary lookup
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -43,15 +58,41 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
+        exp = payload.get("exp")
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = get_user_by_email(db, email=token_data.email)
+    # Session only on a cache miss
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_email(db, email=token_data.email)
     if user is None:
         raise credentials_exception
+    if exp is not None:
+        principal_cache.set(token, token_data.email, exp, user)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+async def get_current_active_user_or_query_token(
+    header_token: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = Query(None, description="Access token, for clients that can't send headers"),
+):
+    # EventSource can't set an Authorization header, so streams may pass the token in the query string
+    token = header_token or token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_active_user(await get_current_user(token))
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    # Admins are configured, not self-service: only emails listed in ADMIN_EMAILS
+    admins = {email.strip().lower() for email in settings.ADMIN_EMAILS}
+    if current_user.email.lower() not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
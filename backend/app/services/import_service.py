@@ -0,0 +1,197 @@
+import asyncio
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import ImportJob
+from app.services.pdf_service import pdf_service, parse_statement_file, merge_statement_holdings
+
+settings = get_settings()
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class StatementImportService:
+    """
+    Upload-based statement import.
+
+    Uploads are streamed to disk under UPLOAD_DIR/<user_id>/<job_id>/, then
+    a background task parses every file in a shared ProcessPoolExecutor so
+    pdfplumber's CPU-bound extraction runs outside the event loop and the
+    GIL. When all files of a job are parsed, their holdings are merged and
+    upserted over the user's holdings. Progress is tracked on the ImportJob row.
+    A job's upload directory is removed as soon as the job finishes, fails or
+    is interrupted; startup sweeps anything older than IMPORT_RETENTION_HOURS
+    left behind by a crash.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Keep references so running jobs aren't garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=settings.IMPORT_MAX_WORKERS)
+        return self._executor
+
+    async def startup(self) -> None:
+        await asyncio.to_thread(self._sweep_stale)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        # Let interrupted jobs record their status and clean up before the engines close
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def create_job(self, db: AsyncSession, user_id: int, files: List[UploadFile]) -> ImportJob:
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(settings.UPLOAD_DIR, str(user_id), job_id)
+        paths = await asyncio.to_thread(self._save_uploads, job_dir, files)
+
+        job = ImportJob(id=job_id, user_id=user_id, status="queued", total_files=len(paths))
+        db.add(job)
+        await db.commit()
+
+        task = asyncio.create_task(self._run_job(job_id, user_id, job_dir, paths))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def get_job(self, db: AsyncSession, user_id: int, job_id: str) -> Optional[ImportJob]:
+        result = await db.execute(select(ImportJob).where(ImportJob.id == job_id, ImportJob.user_id == user_id))
+        return result.scalars().first()
+
+    @staticmethod
+    def _save_uploads(job_dir: str, files: List[UploadFile]) -> List[str]:
+        # Copy in chunks from the spooled upload so large statements never sit fully in memory
+        os.makedirs(job_dir, exist_ok=True)
+        paths = []
+        for index, upload in enumerate(files):
+            path = os.path.join(job_dir, f"{index:04d}.pdf")
+            with open(path, "wb") as dest:
+                shutil.copyfileobj(upload.file, dest, UPLOAD_CHUNK_SIZE)
+            paths.append(path)
+        return paths
+
+    async def _run_job(self, job_id: str, user_id: int, job_dir: str, paths: List[str]) -> None:
+        try:
+            await self._process_job(job_id, user_id, paths)
+        except asyncio.CancelledError:
+            self._update_job(job_id, status="failed", error="Interrupted by server shutdown", finished=True)
+            raise
+        finally:
+            # Uploads and parse sidecars are only needed while the job runs
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    async def _process_job(self, job_id: str, user_id: int, paths: List[str]) -> None:
+        await asyncio.to_thread(self._update_job, job_id, status="processing")
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        parsed = []
+        errors = []
+        futures = [loop.run_in_executor(executor, parse_statement_file, path) for path in paths]
+        for future in asyncio.as_completed(futures):
+            try:
+                holdings = await future
+                parsed.append(holdings)
+                await asyncio.to_thread(self._update_job, job_id, processed=1)
+            except Exception as e:
+                errors.append(str(e))
+                await asyncio.to_thread(self._update_job, job_id, processed=1, failed=1)
+
+        try:
+            if not parsed:
+                raise ValueError(errors[0] if errors else "No statements to import")
+            holdings = merge_statement_holdings(parsed)
+            await self._replace_holdings(user_id, holdings)
+            await asyncio.to_thread(
+                self._update_job, job_id,
+                status="completed", holdings_count=len(holdings),
+                error="; ".join(errors) or None, finished=True,
+            )
+        except Exception as e:
+            print(f"Import job {job_id} failed: {e}")
+            await asyncio.to_thread(self._update_job, job_id, status="failed", error=str(e), finished=True)
+
+    @staticmethod
+    def _sweep_stale() -> None:
+        """
+        Fails jobs stuck in queued/processing past the retention window (the
+        process died mid-job) and removes upload directories that old. Recent
+        jobs are left alone: another worker may still be running them.
+        """
+        retention = timedelta(hours=settings.IMPORT_RETENTION_HOURS)
+        db = SessionLocal()
+        try:
+            stuck = db.query(ImportJob).filter(
+                ImportJob.status.in_(("queued", "processing")),
+                ImportJob.created_at < datetime.utcnow() - retention,
+            ).all()
+            for job in stuck:
+                job.status = "failed"
+                job.error = "Interrupted: the server stopped while the job was running"
+                job.finished_at = datetime.now()
+            db.commit()
+        finally:
+            db.close()
+
+        cutoff = time.time() - retention.total_seconds()
+        if not os.path.isdir(settings.UPLOAD_DIR):
+            return
+        for user_dir in os.scandir(settings.UPLOAD_DIR):
+            if not user_dir.is_dir():
+                continue
+            for job_dir in os.scandir(user_dir.path):
+                if job_dir.is_dir() and job_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(job_dir.path, ignore_errors=True)
+
+    @staticmethod
+    async def _replace_holdings(user_id: int, holdings_data: List[dict]) -> None:
+        async with AsyncSessionLocal() as db:
+            await pdf_service.upsert_holdings(db, user_id, holdings_data)
+
+    @staticmethod
+    def _update_job(
+        job_id: str,
+        status: Optional[str] = None,
+        processed: int = 0,
+        failed: int = 0,
+        holdings_count: Optional[int] = None,
+        error: Optional[str] = None,
+        finished: bool = False,
+    ) -> None:
+        db = SessionLocal()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if job is None:
+                return
+            if status:
+                job.status = status
+            job.processed_files += processed
+            job.failed_files += failed
+            if holdings_count is not None:
+                job.holdings_count = holdings_count
+            if error:
+                job.error = error[:1000]
+            if finished:
+                job.finished_at = datetime.now()
+            db.commit()
+        finally:
+            db.close()
+
+
+import_service = StatementImportService()
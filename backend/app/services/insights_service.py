@@ -0,0 +1,297 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+import numpy as np
+from app.config import get_settings
+from app.database import ReadSessionLocal
+from app.models import PriceRollup
+from app.schemas import StockQuote
+from app.schemas.insights import InsightZone, MarketInsights
+from app.services.market_service import market_service
+from app.services.price_history_service import price_history_service
+from app.services.profile_cache import format_market_cap, profile_cache
+from app.services.quote_cache import quote_cache
+from app.services.scoring_service import buy_score_service
+
+settings = get_settings()
+
+# Bound parameters per IN (...) query, under SQLite's variable limit
+SYMBOL_CHUNK = 500
+# How long a request right after startup waits for the first snapshot
+FIRST_SNAPSHOT_WAIT_SECONDS = 10.0
+
+
+class UniverseStats(NamedTuple):
+    """Per-symbol columns for the universe, aligned with `symbols`."""
+    symbols: np.ndarray
+    price: np.ndarray
+    change_percent: np.ndarray
+    week52_low: np.ndarray
+    week52_high: np.ndarray
+    position: np.ndarray  # 0 at the 52-week low, 1 at the high
+    buy_score: np.ndarray
+
+
+def load_universe(config=settings) -> List[str]:
+    symbols = {s.strip().upper() for s in config.INSIGHTS_UNIVERSE if s.strip()}
+    if config.INSIGHTS_UNIVERSE_FILE:
+        try:
+            with open(config.INSIGHTS_UNIVERSE_FILE) as f:
+                symbols.update(line.strip().upper() for line in f if line.strip() and not line.startswith("#"))
+        except OSError as e:
+            print(f"Could not read insights universe {config.INSIGHTS_UNIVERSE_FILE}: {e}")
+    return sorted(symbols)
+
+
+class InsightsService:
+    """
+    Opportunity / overheated / neutral zones over a symbol universe.
+
+    A background cycle refreshes quotes for a rotating slice of the
+    universe (so daily bars accumulate for symbols nobody holds), loads the
+    last year of 1d bars for every universe symbol, reduces them to 52-week
+    low/high, last close and day change with grouped NumPy reductions,
+    overlays any live quote already in the quote cache, and classifies each
+    symbol by where its price sits in the 52-week range. Symbols without
+    enough bars yet fall back to their cached (or mock) quote. The result is kept as a ready-made MarketInsights
+    snapshot, so serving it costs the same for 40 symbols or 40,000.
+    """
+
+    def __init__(self):
+        # Empty zones until the first cycle finishes
+        self._snapshot: MarketInsights = self._build_snapshot(None)
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Rotates through the universe when it's larger than one ingest batch
+        self._ingest_offset = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        # First snapshot from what's already stored, without waiting on upstream quota
+        ingest = False
+        while True:
+            try:
+                await self.refresh(ingest=ingest)
+            except Exception as e:
+                print(f"Insights refresh failed: {e}")
+            if not ingest:
+                ingest = True
+                continue
+            await asyncio.sleep(settings.INSIGHTS_REFRESH_INTERVAL_SECONDS)
+
+    async def refresh(self, ingest: bool = True) -> MarketInsights:
+        universe = load_universe()
+        if ingest:
+            await self._ingest(universe)
+        stats = await asyncio.to_thread(self.compute_stats, universe)
+        stats = self._with_quote_fallback(universe, stats)
+        self._snapshot = self._build_snapshot(stats)
+        self._ready.set()
+        return self._snapshot
+
+    async def _ingest(self, universe: List[str]) -> None:
+        """
+        Refresh quotes for up to INSIGHTS_INGEST_BATCH_SIZE universe symbols,
+        rotating through the universe, and flush their ticks so daily bars
+        build up for symbols nobody holds. A no-op without an API key.
+        """
+        if not universe:
+            return
+        batch_size = max(0, settings.INSIGHTS_INGEST_BATCH_SIZE)
+        start = self._ingest_offset % len(universe)
+        rotated = universe[start:] + universe[:start]
+        self._ingest_offset = start + batch_size
+        batch = await market_service.refresh_quotes(rotated[:batch_size])
+        if batch.errors:
+            print(f"Insights ingest: {len(batch.errors)} symbols failed")
+        await price_history_service.flush()
+
+    def _with_quote_fallback(self, universe: List[str], stats: UniverseStats) -> UniverseStats:
+        """
+        Adds universe symbols without INSIGHTS_MIN_HISTORY_DAYS of bars yet,
+        taken from their cached (or, without an API key, mock) quotes, so the
+        zones aren't empty while history builds up.
+        """
+        have = set(stats.symbols.tolist())
+        missing = [s for s in universe if s not in have]
+        quotes = market_service.get_cached_quotes(missing).quotes if missing else {}
+        if not quotes:
+            return stats
+
+        rows = list(quotes.values())
+        price = np.array([q.price for q in rows], dtype=np.float64)
+        low = np.array([q.week52_low for q in rows], dtype=np.float64)
+        high = np.array([q.week52_high for q in rows], dtype=np.float64)
+        span = high - low
+        columns = UniverseStats(
+            symbols=np.array([q.symbol for q in rows], dtype=object),
+            price=price,
+            change_percent=np.array([q.change_percent for q in rows], dtype=np.float64),
+            week52_low=low,
+            week52_high=high,
+            position=np.divide(price - low, span, out=np.full(len(rows), 0.5), where=span > 0),
+            buy_score=np.array([q.buy_score for q in rows], dtype=np.int64),
+        )
+        merged = [np.concatenate(pair) for pair in zip(stats, columns)]
+        # Back in symbol order, which zone ties rely on
+        order = np.argsort(merged[0].astype(str), kind="stable")
+        return UniverseStats(*(column[order] for column in merged))
+
+    def snapshot(self) -> MarketInsights:
+        """Latest precomputed insights."""
+        return self._snapshot
+
+    async def wait_snapshot(self) -> MarketInsights:
+        """Latest insights, waiting briefly for the first cycle if it's still running after startup."""
+        if not self._ready.is_set() and self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._ready.wait(), FIRST_SNAPSHOT_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        return self._snapshot
+
+    def compute_stats(self, universe: List[str], now: Optional[datetime] = None) -> UniverseStats:
+        """Vectorized 52-week statistics for `universe` (sorted) from stored 1d bars."""
+        now = now or datetime.utcnow()
+        since = now - timedelta(days=365)
+        symbols = np.array(universe, dtype=object)
+        n = len(universe)
+        index = {s: i for i, s in enumerate(universe)}
+
+        sym_idx, high, low, close = self._load_daily_bars(universe, index, since)
+        # Group by symbol without trusting the database collation; bars stay in day order within a symbol
+        order = np.argsort(sym_idx, kind="stable")
+        sym_idx, high, low, close = sym_idx[order], high[order], low[order], close[order]
+
+        counts = np.bincount(sym_idx, minlength=n)
+        week52_high = np.full(n, -np.inf)
+        week52_low = np.full(n, np.inf)
+        np.maximum.at(week52_high, sym_idx, high)
+        np.minimum.at(week52_low, sym_idx, low)
+
+        # Each symbol's latest bar ends its run
+        ends = np.cumsum(counts) - 1
+        has_bars = counts > 0
+        price = np.full(n, np.nan)
+        prev_close = np.full(n, np.nan)
+        price[has_bars] = close[ends[has_bars]]
+        has_prev = counts > 1
+        prev_close[has_prev] = close[ends[has_prev] - 1]
+
+        # A live quote, when the cache has one, beats yesterday's close
+        for i in np.flatnonzero(has_bars).tolist():
+            quote = quote_cache.peek(universe[i])
+            if quote is not None:
+                price[i] = quote.price
+                prev_close[i] = quote.price / (1 + quote.change_percent / 100) if quote.change_percent > -100 else np.nan
+        week52_high = np.fmax(week52_high, price)
+        week52_low = np.fmin(week52_low, price)
+
+        change_percent = np.divide(
+            (price - prev_close) * 100, prev_close, out=np.zeros(n), where=np.isfinite(prev_close) & (prev_close > 0)
+        )
+        span = week52_high - week52_low
+        position = np.divide(price - week52_low, span, out=np.full(n, 0.5), where=np.isfinite(span) & (span > 0))
+
+        keep = counts >= settings.INSIGHTS_MIN_HISTORY_DAYS
+        kept = [universe[i] for i in np.flatnonzero(keep).tolist()]
+        scores = buy_score_service.get_scores_blocking(kept)
+        return UniverseStats(
+            symbols=symbols[keep],
+            price=price[keep],
+            change_percent=change_percent[keep],
+            week52_low=week52_low[keep],
+            week52_high=week52_high[keep],
+            position=position[keep],
+            buy_score=np.array([scores[s] for s in kept], dtype=np.int64),
+        )
+
+    def _load_daily_bars(self, universe: List[str], index, since: datetime):
+        sym_idx: List[int] = []
+        high: List[float] = []
+        low: List[float] = []
+        close: List[float] = []
+        db = ReadSessionLocal()
+        try:
+            for start in range(0, len(universe), SYMBOL_CHUNK):
+                rows = (
+                    db.query(PriceRollup.symbol, PriceRollup.high, PriceRollup.low, PriceRollup.close)
+                    .filter(
+                        PriceRollup.resolution == "1d",
+                        PriceRollup.bucket_start >= since,
+                        PriceRollup.symbol.in_(universe[start:start + SYMBOL_CHUNK]),
+                    )
+                    .order_by(PriceRollup.symbol, PriceRollup.bucket_start)
+                )
+                for symbol, h, l, c in rows:
+                    sym_idx.append(index[symbol])
+                    high.append(h)
+                    low.append(l)
+                    close.append(c)
+        finally:
+            db.close()
+        return (
+            np.array(sym_idx, dtype=np.int64),
+            np.array(high, dtype=np.float64),
+            np.array(low, dtype=np.float64),
+            np.array(close, dtype=np.float64),
+        )
+
+    def _build_snapshot(self, stats: Optional[UniverseStats]) -> MarketInsights:
+        if stats is None:
+            empty = np.zeros(0, dtype=bool)
+            return MarketInsights(
+                opportunity_zone=self._zone("Opportunity Zone", "Stocks near 52-week low", None, empty, None),
+                overheated_zone=self._zone("Overheated Zone", "Stocks near 52-week high", None, empty, None),
+                neutral_zone=self._zone("Neutral Zone", "Stocks in mid-range", None, empty, None),
+            )
+
+        opportunity = stats.position <= settings.INSIGHTS_OPPORTUNITY_MAX_POSITION
+        overheated = stats.position >= settings.INSIGHTS_OVERHEATED_MIN_POSITION
+        neutral = ~(opportunity | overheated)
+        return MarketInsights(
+            # Most attractive first in the opportunity zone, most stretched first when overheated
+            opportunity_zone=self._zone("Opportunity Zone", "Stocks near 52-week low", stats, opportunity, -stats.buy_score),
+            overheated_zone=self._zone("Overheated Zone", "Stocks near 52-week high", stats, overheated, stats.buy_score),
+            neutral_zone=self._zone("Neutral Zone", "Stocks in mid-range", stats, neutral, -stats.buy_score),
+        )
+
+    def _zone(self, title: str, description: str, stats: Optional[UniverseStats], mask: np.ndarray, sort_key) -> InsightZone:
+        members = np.flatnonzero(mask)
+        stocks = []
+        if stats is not None and len(members):
+            # Stable sort keeps ties in symbol order
+            top = members[np.argsort(sort_key[members], kind="stable")[:settings.INSIGHTS_ZONE_LIMIT]]
+            stocks = [self._to_quote(stats, i) for i in top.tolist()]
+        return InsightZone(title=title, description=description, count=len(members), stocks=stocks)
+
+    @staticmethod
+    def _to_quote(stats: UniverseStats, i: int) -> StockQuote:
+        symbol = str(stats.symbols[i])
+        cached = quote_cache.peek(symbol)
+        profile = None if cached else profile_cache.get(symbol)
+        return StockQuote(
+            symbol=symbol,
+            name=cached.name if cached else (profile and profile.name) or symbol,
+            price=round(float(stats.price[i]), 2),
+            change_percent=round(float(stats.change_percent[i]), 2),
+            week52_low=round(float(stats.week52_low[i]), 2),
+            week52_high=round(float(stats.week52_high[i]), 2),
+            buy_score=int(stats.buy_score[i]),
+            market_cap=cached.market_cap if cached else format_market_cap(profile.market_cap if profile else None),
+        )
+
+
+insights_service = InsightsService()
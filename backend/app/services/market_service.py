@@ -1,76 +1,281 @@
+import asyncio
+import time
+import zlib
+from datetime import datetime
 import httpx
-from typing import List, Dict, Optional
+import numpy as np
+from typing import List, Dict, Optional, Set
 from app.config import get_settings
-from app.schemas import StockQuote
-from cachetools import TTLCache
+from app.schemas import StockQuote, QuoteBatch
+from app.services.portfolio_aggregator import portfolio_aggregator
+from app.services.price_history_service import price_history_service
+from app.services.profile_cache import Profile, format_market_cap, profile_cache
+from app.services.quote_cache import quote_cache
+from app.services.scoring_service import WINDOW_DAYS, buy_score_service
+from app.services.week52_index import week52_index
+from app.utils.rate_limit import TokenBucket
 import random
 
 settings = get_settings()
 
-# Cache for 1 minute to avoid rate limits
-quote_cache = TTLCache(maxsize=100, ttl=60)
+# Shared across all requests so the whole app stays inside the Finnhub quota
+finnhub_rate_limiter = TokenBucket(
+    rate_per_minute=settings.FINNHUB_RATE_LIMIT_PER_MINUTE,
+    burst=settings.FINNHUB_RATE_LIMIT_BURST,
+)
 
 class MarketService:
     BASE_URL = "https://finnhub.io/api/v1"
 
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        # Caps in-flight upstream requests across every caller, not per batch
+        self._fetch_semaphore = asyncio.Semaphore(settings.QUOTE_FETCH_CONCURRENCY)
+        # symbol -> task loading it from upstream, shared by every concurrent miss
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Symbols asked for on cache-only paths, loaded by the next background refresh
+        self._wanted: Set[str] = set()
+
+    async def startup(self) -> None:
+        """Open the app-scoped Finnhub client. Called from the FastAPI lifespan."""
+        self._get_client()
+
+    async def aclose(self) -> None:
+        """Close the Finnhub client. Called from the FastAPI lifespan on shutdown."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # One pooled HTTP/2 client so batches multiplex over kept-alive
+        # connections instead of paying a TLS handshake per symbol.
+        # Created lazily as well so scripts outside the app still work.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                http2=True,
+                timeout=settings.FINNHUB_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.QUOTE_FETCH_CONCURRENCY,
+                    max_keepalive_connections=settings.QUOTE_FETCH_CONCURRENCY,
+                    keepalive_expiry=settings.FINNHUB_KEEPALIVE_SECONDS,
+                ),
+            )
+        return self._client
+
+    async def _finnhub_get(self, path: str, params: Dict[str, str]) -> httpx.Response:
+        """
+        GET a Finnhub endpoint through the rate limiter.
+        On 429 the limiter is paused for Retry-After and the request is queued
+        again, rather than failing straight through to mock data.
+        """
+        params = {**params, "token": settings.FINNHUB_API_KEY}
+        max_wait = settings.FINNHUB_RATE_LIMIT_MAX_WAIT_SECONDS
+        # Bounded so a drained quota fails fast instead of stalling every caller
+        timeout = max_wait
+        for attempt in range(settings.FINNHUB_MAX_RETRIES + 1):
+            await finnhub_rate_limiter.acquire(timeout=timeout)
+            response = await self._get_client().get(path, params=params)
+            if response.status_code != 429 or attempt == settings.FINNHUB_MAX_RETRIES:
+                break
+
+            # Capped at the max wait so callers already queued can still get through the pause
+            retry_after = min(_parse_retry_after(response.headers.get("Retry-After")), max_wait)
+            print(f"Finnhub rate limit hit on {path}, retrying in {retry_after:.1f}s")
+            finnhub_rate_limiter.pause(retry_after)
+            # The retry itself waits out the pause; the max wait applies after it
+            timeout = retry_after + max_wait
+
+        response.raise_for_status()
+        return response
+
+    def _has_api_key(self) -> bool:
+        return bool(settings.FINNHUB_API_KEY) and settings.FINNHUB_API_KEY != "your_finnhub_api_key"
+
     async def get_quote(self, symbol: str) -> Optional[StockQuote]:
         symbol = symbol.upper()
-        if symbol in quote_cache:
-            return quote_cache[symbol]
-
-        if not settings.FINNHUB_API_KEY or settings.FINNHUB_API_KEY == "your_finnhub_api_key":
-            # Return mock data if no API key or default placeholder
+        try:
+            return await self._fetch_quote(symbol)
+        except Exception as e:
+            print(f"Error fetching quote for {symbol}: {e}")
             return self._get_mock_quote(symbol)
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.BASE_URL}/quote",
-                    params={"symbol": symbol, "token": settings.FINNHUB_API_KEY}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Finnhub response: c: Current, h: High, l: Low, o: Open, pc: Previous close
-                if data.get("c") == 0 and data.get("pc") == 0:
-                     return self._get_mock_quote(symbol) # Fallback if symbol not found or empty
-
-                current_price = float(data["c"])
-                
-                # Finnhub quote endpoint doesn't return name, market_cap, etc.
-                # We would need a separate call for profile, but for now we'll estimate/mock missing fields
-                # to keep it fast and simple.
-                
-                quote = StockQuote(
-                    symbol=symbol,
-                    name=symbol, # Placeholder as quote endpoint doesn't return name
-                    price=current_price,
-                    change_percent=float(data["dp"]),
-                    change=float(data["d"]),
-                    week52_high=float(data["h"]), # Using day high as proxy if 52w not available, or mock it
-                    week52_low=float(data["l"]),  # Using day low as proxy
-                    buy_score=random.randint(40, 90), # Mock score
-                    market_cap="100B" # Mock cap
-                )
-                
-                # Improve data if possible (mocking 52w range based on price)
-                quote.week52_high = round(current_price * 1.2, 2)
-                quote.week52_low = round(current_price * 0.8, 2)
-                
-                quote_cache[symbol] = quote
-                return quote
-            except Exception as e:
-                print(f"Error fetching quote for {symbol}: {e}")
-                return self._get_mock_quote(symbol)
-
     async def get_quotes(self, symbols: List[str]) -> List[StockQuote]:
+        batch = await self.get_quotes_batch(symbols)
         quotes = []
         for symbol in symbols:
-            quote = await self.get_quote(symbol)
+            quote = batch.quotes.get(symbol.strip().upper())
             if quote:
                 quotes.append(quote)
         return quotes
 
+    async def get_quotes_batch(self, symbols: List[str]) -> QuoteBatch:
+        """
+        Fetches quotes for many symbols concurrently.
+        Duplicate symbols are fetched once; failures are reported per symbol
+        in `errors` instead of failing the whole batch.
+        """
+        unique_symbols = _normalize_symbols(symbols)
+        if self._has_api_key():
+            # Score and seed 52-week ranges for every miss in bulk instead of one query per symbol
+            await asyncio.gather(buy_score_service.get_scores(unique_symbols), week52_index.get_ranges(unique_symbols))
+        results = await asyncio.gather(*(self._fetch_quote(s) for s in unique_symbols), return_exceptions=True)
+        return _collect_batch(unique_symbols, results)
+
+    def get_cached_quotes(self, symbols: List[str]) -> QuoteBatch:
+        """
+        Quotes served from the cache only (fresh or stale), never waiting on
+        upstream. Uncached symbols are reported in `errors`; they and stale
+        ones are queued for the background refresher, which loads them in
+        batches.
+        Without an API key mock quotes are returned as usual.
+        """
+        batch = QuoteBatch()
+        for symbol in _normalize_symbols(symbols):
+            if not self._has_api_key():
+                batch.quotes[symbol] = self._get_mock_quote(symbol)
+                continue
+            cached = quote_cache.get(symbol)
+            if cached is None:
+                self.want(symbol)
+                batch.errors[symbol] = "Not cached yet; queued for refresh"
+                continue
+            if not cached.is_fresh:
+                self.want(symbol)
+            batch.quotes[symbol] = cached.quote
+        return batch
+
+    def want(self, symbol: str) -> None:
+        """Queue `symbol` for the next background refresh; the queue is capped so junk can't grow it."""
+        if len(self._wanted) < settings.QUOTE_REFRESH_QUEUE_MAXSIZE:
+            self._wanted.add(symbol)
+
+    def take_wanted(self) -> Set[str]:
+        wanted, self._wanted = self._wanted, set()
+        return wanted
+
+    async def refresh_quotes(self, symbols: List[str]) -> QuoteBatch:
+        """
+        Loads quotes from upstream regardless of cache freshness and stores
+        them in the cache. Used by the background refresher to keep hot
+        symbols warm; a no-op without an API key since mock quotes aren't cached.
+        """
+        if not self._has_api_key():
+            return QuoteBatch()
+        unique_symbols = _normalize_symbols(symbols)
+        await asyncio.gather(buy_score_service.get_scores(unique_symbols), week52_index.get_ranges(unique_symbols))
+        results = await asyncio.gather(*(self._load_quote_once(s) for s in unique_symbols), return_exceptions=True)
+        return _collect_batch(unique_symbols, results)
+
+    async def _fetch_quote(self, symbol: str) -> StockQuote:
+        cached = quote_cache.get(symbol)
+        if cached:
+            if not cached.is_fresh:
+                # Stale-while-revalidate: answer now, refresh once in the background
+                self._load_quote_once(symbol).add_done_callback(_log_refresh_failure)
+            return cached.quote
+
+        if not self._has_api_key():
+            # Return mock data if no API key or default placeholder
+            return self._get_mock_quote(symbol)
+
+        # Shield so one caller going away doesn't cancel the load for the others
+        return await asyncio.shield(self._load_quote_once(symbol))
+
+    async def refresh_profiles(self, symbols: List[str]) -> int:
+        """
+        Loads stored company profiles for `symbols` into the profile cache and
+        re-fetches up to PROFILE_REFRESH_BATCH_SIZE missing or day-old ones
+        from Finnhub; the rest, and any that failed, are queued for the next
+        call. Returns how many were stored.
+        """
+        due = await asyncio.to_thread(profile_cache.due_blocking, _normalize_symbols(symbols))
+        if not self._has_api_key():
+            return 0
+        batch_size = max(0, settings.PROFILE_REFRESH_BATCH_SIZE)
+        due, later = due[:batch_size], due[batch_size:]
+        results = await asyncio.gather(*(self._fetch_profile(s) for s in due), return_exceptions=True)
+        fetched = {}
+        for symbol, result in zip(due, results):
+            if isinstance(result, BaseException):
+                print(f"Error fetching profile for {symbol}: {result}")
+                later.append(symbol)
+            elif result.name or quote_cache.peek(symbol) is not None:
+                # An empty profile is only worth remembering for a real, quoted symbol (e.g. an ETF)
+                fetched[symbol] = result
+        for symbol in later:
+            profile_cache.want(symbol)
+        await asyncio.to_thread(profile_cache.store_blocking, fetched)
+        return len(fetched)
+
+    async def _fetch_profile(self, symbol: str) -> Profile:
+        async with self._fetch_semaphore:
+            response = await self._finnhub_get("/stock/profile2", {"symbol": symbol})
+        data = response.json() or {}
+        # Empty for symbols without a profile (most ETFs); stored anyway so they aren't re-fetched all day
+        market_cap = data.get("marketCapitalization")  # USD millions
+        return Profile(
+            name=data.get("name") or None,
+            market_cap=float(market_cap) * 1e6 if market_cap else None,
+            updated_at=datetime.utcnow(),
+        )
+
+    def _load_quote_once(self, symbol: str) -> asyncio.Task:
+        """
+        Single-flight: returns the in-flight upstream load for `symbol`,
+        starting one only if none is running.
+        """
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._load_quote(symbol))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+        return task
+
+    async def _load_quote(self, symbol: str) -> StockQuote:
+        async with self._fetch_semaphore:
+            started = time.monotonic()
+            try:
+                response = await self._finnhub_get("/quote", {"symbol": symbol})
+            except Exception:
+                quote_cache.record_refresh(time.monotonic() - started, ok=False)
+                raise
+            quote_cache.record_refresh(time.monotonic() - started)
+        data = response.json()
+        
+        # Finnhub response: c: Current, h: High, l: Low, o: Open, pc: Previous close
+        if data.get("c") == 0 and data.get("pc") == 0:
+            raise LookupError(f"No quote data for {symbol}")
+
+        current_price = float(data["c"])
+
+        # Stored daily bars plus today's range from this quote
+        await week52_index.get_range(symbol)
+        day_high = max(float(data["h"]), current_price)
+        day_low = min(float(data["l"]) or current_price, current_price)
+        week52_index.record(symbol, day_high, day_low)
+        week52_low, week52_high = week52_index.peek(symbol)
+        
+        # Finnhub's quote endpoint has no name or market cap; the profile cache does, without another call
+        profile = profile_cache.get(symbol)
+        quote = StockQuote(
+            symbol=symbol,
+            name=(profile and profile.name) or symbol,
+            price=current_price,
+            change_percent=float(data["dp"]),
+            change=float(data["d"]),
+            week52_high=round(week52_high, 2),
+            week52_low=round(week52_low, 2),
+            buy_score=await buy_score_service.get_score(symbol),
+            market_cap=format_market_cap(profile.market_cap if profile else None),
+        )
+        
+        quote_cache.set(symbol, quote)
+        # Price tick: roll running portfolio totals forward for holders of this symbol
+        portfolio_aggregator.apply_price(symbol, quote.price)
+        price_history_service.record(symbol, quote.price)
+        return quote
+
     def _get_mock_quote(self, symbol: str) -> StockQuote:
         # Realistic mock prices based on approx market values (Nov 2025)
         # Adjusted to match Statement Total of ~$24,900
@@ -87,8 +292,6 @@ class MarketService:
             "BDN": 6.10, "ORC": 7.45, "TWO": 12.10
         }
 
-        import random
-        
         if symbol in mock_prices:
             base_price = mock_prices[symbol]
             # Add small random variation
@@ -100,6 +303,7 @@ class MarketService:
             current_price = round(base_price, 2)
 
         change = random.uniform(-2, 2)
+        history = _mock_history(symbol, base_price)
         
         return StockQuote(
             symbol=symbol,
@@ -107,10 +311,42 @@ class MarketService:
             price=current_price,
             change_percent=round((change / current_price) * 100, 2),
             change=round(change, 2),
-            week52_high=round(current_price * 1.4, 2),
-            week52_low=round(current_price * 0.7, 2),
-            buy_score=random.randint(30, 95),
+            week52_high=round(max(float(history.max()), current_price), 2),
+            week52_low=round(min(float(history.min()), current_price), 2),
+            buy_score=buy_score_service.score_series(f"mock:{symbol}", lambda: history),
             market_cap=f"{round(random.uniform(10, 2000), 1)}B"
         )
 
+def _mock_history(symbol: str, price: float) -> np.ndarray:
+    """A year of made-up daily closes ending near `price`, the same for a symbol on every call."""
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    returns = rng.normal(rng.uniform(-0.001, 0.0015), rng.uniform(0.008, 0.022), WINDOW_DAYS)
+    path = np.exp(np.cumsum(returns))
+    return price * path / path[-1]
+
+def _normalize_symbols(symbols: List[str]) -> List[str]:
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+def _collect_batch(symbols: List[str], results: List[object]) -> QuoteBatch:
+    batch = QuoteBatch()
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, BaseException):
+            print(f"Error fetching quote for {symbol}: {result}")
+            batch.errors[symbol] = str(result) or type(result).__name__
+        else:
+            batch.quotes[symbol] = result
+    return batch
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    # Background refreshes have no awaiting caller, so surface their errors here
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background quote refresh failed: {task.exception()}")
+
+def _parse_retry_after(value: Optional[str]) -> float:
+    # Finnhub sends seconds; fall back to a full quota window if it's missing or odd
+    try:
+        return max(1.0, float(value))
+    except (TypeError, ValueError):
+        return 60.0
+
 market_service = MarketService()
@@ -1,10 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional
+import asyncio
 from datetime import datetime
+import hashlib
+import json
 import os
-import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import pdfplumber
+import pypdfium2
+from app.config import get_settings
 from app.models import BrokerageConnection, Holding
-from sqlalchemy.orm import Session
+from app.services.statement_parsers import detect_broker, get_parser, is_holdings_page
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+settings = get_settings()
+
+# Bump when the shape of parsed holdings changes so stale sidecars are ignored
+HOLDINGS_CACHE_VERSION = 2
 
 
 class PDFService:
@@ -19,12 +32,19 @@ class PDFService:
             "resources",
             "Statement10312025.pdf"
         )
+        # pdf_path -> {"sha256", "mtime", "size", "holdings"}
+        self._holdings_cache: Dict[str, Dict[str, Any]] = {}
+        self._page_executor: Optional[ProcessPoolExecutor] = None
+
+    async def get_connection(self, db: AsyncSession, user_id: int) -> Optional[BrokerageConnection]:
+        result = await db.execute(select(BrokerageConnection).where(BrokerageConnection.user_id == user_id))
+        return result.scalars().first()
 
-    def connect_account(self, db: Session, user_id: int) -> BrokerageConnection:
+    async def connect_account(self, db: AsyncSession, user_id: int) -> BrokerageConnection:
         """
         Creates a connection record for PDF-based import.
         """
-        connection = db.query(BrokerageConnection).filter(BrokerageConnection.user_id == user_id).first()
+        connection = await self.get_connection(db, user_id)
         if connection:
             connection.is_connected = True
             connection.provider = "pdf_import"
@@ -37,82 +57,174 @@ class PDFService:
             )
             db.add(connection)
         
-        db.commit()
-        db.refresh(connection)
+        await db.commit()
+        await db.refresh(connection)
         return connection
 
-    def disconnect_account(self, db: Session, user_id: int) -> bool:
-        connection = db.query(BrokerageConnection).filter(BrokerageConnection.user_id == user_id).first()
+    async def disconnect_account(self, db: AsyncSession, user_id: int) -> bool:
+        connection = await self.get_connection(db, user_id)
         if connection:
             connection.is_connected = False
             connection.access_token = None
             connection.refresh_token = None
-            db.commit()
+            await db.commit()
             return True
         return False
 
-    def parse_pdf_holdings(self) -> List[Dict[str, Any]]:
+    def parse_pdf_holdings(self, pdf_path: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Parses the PDF statement and extracts holdings data using pdfplumber.
         Returns a list of holdings with symbol, name, quantity, avg_cost, and sector.
+
+        Results are cached in memory and in a JSON sidecar under
+        HOLDINGS_CACHE_DIR, keyed by the file's content hash and mtime, so pdfplumber only runs
+        when the statement actually changes.
         """
-        holdings = []
-        
+        pdf_path = pdf_path or self.pdf_path
+
         # Check if PDF exists
-        if not os.path.exists(self.pdf_path):
-            print(f"PDF not found at {self.pdf_path}")
-            return holdings
-        
+        if not os.path.exists(pdf_path):
+            print(f"PDF not found at {pdf_path}")
+            return []
+
         try:
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if not text:
-                        continue
-                    
-                    # Look for holdings section
-                    if "Holdings" not in text:
-                        continue
-                    
-                    lines = text.split('\n')
-                    
-                    for i, line in enumerate(lines):
-                        # Pattern to match holdings lines with symbol in parentheses
-                        # Example: "IONQ INC COM (IONQ) 2,275.50 37.000 62.3800 2,308.06 590.40 1,717.66"
-                        match = re.search(r'(.*?)\s+\(([A-Z]+)\)\s+([\d,.-]+)\s+([\d,.-]+)\s+([\d,.-]+)\s+([\d,.-]+)\s+([\d,.-]+)', line)
-                        
-                        if match:
-                            name = match.group(1).strip()
-                            symbol = match.group(2).strip()
-                            quantity_str = match.group(4).replace(',', '')
-                            cost_basis_str = match.group(6).replace(',', '')
-                            
-                            try:
-                                quantity = float(quantity_str)
-                                cost_basis = float(cost_basis_str)
-                                avg_cost = cost_basis / quantity if quantity > 0 else 0
-                                
-                                # Determine sector based on symbol or name
-                                sector = self._determine_sector(symbol, name)
-                                
-                                holdings.append({
-                                    "symbol": symbol,
-                                    "name": name,
-                                    "quantity": quantity,
-                                    "avg_cost": round(avg_cost, 2),
-                                    "sector": sector
-                                })
-                            except (ValueError, ZeroDivisionError) as e:
-                                print(f"Error parsing line: {line}, error: {e}")
-                                continue
-            
-            print(f"Successfully parsed {len(holdings)} holdings from PDF")
-            return holdings
-            
+            return self.load_holdings(pdf_path)
         except Exception as e:
             print(f"Error parsing PDF: {e}")
-            return holdings
-    
+            return []
+
+    def load_holdings(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Same as parse_pdf_holdings (including the cache) but for an explicit
+        file, and raising instead of returning [] when the PDF can't be read.
+        """
+        stat = os.stat(pdf_path)
+
+        # Fast path: file untouched since we last looked, skip hashing
+        entry = self._holdings_cache.get(pdf_path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return [dict(h) for h in entry["holdings"]]
+
+        sha256 = self._file_sha256(pdf_path)
+        entry = self._read_holdings_sidecar(pdf_path, sha256)
+        if entry is None:
+            holdings = self._extract_holdings(pdf_path)
+            print(f"Successfully parsed {len(holdings)} holdings from PDF")
+            entry = {"version": HOLDINGS_CACHE_VERSION, "sha256": sha256, "holdings": holdings}
+
+        entry["mtime"] = stat.st_mtime
+        entry["size"] = stat.st_size
+        self._write_holdings_sidecar(pdf_path, entry)
+        self._holdings_cache[pdf_path] = entry
+        return [dict(h) for h in entry["holdings"]]
+
+    def statement_fingerprint(self, pdf_path: Optional[str] = None) -> Optional[str]:
+        """Cheap change marker for a statement (mtime + size), None if it doesn't exist."""
+        try:
+            stat = os.stat(pdf_path or self.pdf_path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def invalidate_holdings_cache(self, pdf_path: Optional[str] = None) -> None:
+        """Drop the cached holdings for a statement (both memory and sidecar)."""
+        pdf_path = pdf_path or self.pdf_path
+        self._holdings_cache.pop(pdf_path, None)
+        try:
+            os.remove(self._sidecar_path(pdf_path))
+        except OSError:
+            pass
+
+    def _extract_holdings(self, pdf_path: str, parallel: bool = True) -> List[Dict[str, Any]]:
+        # Cheap pdfium text pass picks the pages worth running pdfplumber on and
+        # which broker's parser to use; disclosure pages are never laid out.
+        # Fall back to every page if the pre-scan fails or finds nothing.
+        # Large statements fan pages out to a process pool unless `parallel` is
+        # off, as it is for callers that already run inside pool workers.
+        scan = scan_statement(pdf_path)
+        page_numbers = scan.pages
+        if not page_numbers:
+            with pdfplumber.open(pdf_path) as pdf:
+                page_numbers = list(range(len(pdf.pages)))
+
+        workers = min(settings.PDF_PAGE_WORKERS, len(page_numbers))
+        if parallel and workers > 1 and len(page_numbers) >= settings.PDF_PARALLEL_MIN_PAGES:
+            chunk_size = -(-len(page_numbers) // workers)
+            chunks = [page_numbers[i:i + chunk_size] for i in range(0, len(page_numbers), chunk_size)]
+            results = self._get_page_executor().map(
+                extract_holdings_from_pages, [pdf_path] * len(chunks), chunks, [scan.broker] * len(chunks)
+            )
+            return [h for chunk in results for h in chunk]
+
+        return self._extract_pages(pdf_path, page_numbers, scan.broker)
+
+    def _get_page_executor(self) -> ProcessPoolExecutor:
+        if self._page_executor is None:
+            self._page_executor = ProcessPoolExecutor(max_workers=settings.PDF_PAGE_WORKERS)
+        return self._page_executor
+
+    def shutdown(self) -> None:
+        if self._page_executor is not None:
+            self._page_executor.shutdown(wait=False, cancel_futures=True)
+            self._page_executor = None
+
+    def _extract_pages(self, pdf_path: str, page_numbers: List[int], broker: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Full pdfplumber extraction of the given 0-based pages, in order."""
+        parser = get_parser(broker)
+        holdings = []
+
+        # pdfplumber's `pages` is 1-based and skips loading every other page
+        with pdfplumber.open(pdf_path, pages=[n + 1 for n in page_numbers]) as pdf:
+            for page in pdf.pages:
+                for row in parser.parse_page(page):
+                    holdings.append({
+                        "symbol": row.symbol,
+                        "name": row.name,
+                        "quantity": row.quantity,
+                        "avg_cost": round(row.cost_basis / row.quantity, 2) if row.quantity > 0 else 0,
+                        "sector": self._determine_sector(row.symbol, row.name)
+                    })
+                page.close()
+
+        return holdings
+
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _sidecar_path(pdf_path: str) -> str:
+        # Parsed holdings are private: keep them in the cache dir, not next to the statement
+        key = hashlib.blake2b(os.path.abspath(pdf_path).encode(), digest_size=8).hexdigest()
+        name = f"{os.path.basename(pdf_path)}.{key}.holdings.json"
+        return os.path.join(settings.HOLDINGS_CACHE_DIR, name)
+
+    def _read_holdings_sidecar(self, pdf_path: str, sha256: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._sidecar_path(pdf_path)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != HOLDINGS_CACHE_VERSION or entry.get("sha256") != sha256:
+            return None
+        return entry
+
+    def _write_holdings_sidecar(self, pdf_path: str, entry: Dict[str, Any]) -> None:
+        # Write to a temp file and rename so a concurrent reader never sees half a file
+        sidecar = self._sidecar_path(pdf_path)
+        tmp_path = f"{sidecar}.tmp"
+        try:
+            os.makedirs(settings.HOLDINGS_CACHE_DIR, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            print(f"Could not write holdings cache {sidecar}: {e}")
+
     def _determine_sector(self, symbol: str, name: str) -> str:
         """Determine sector based on symbol or name."""
         # Map common symbols to sectors
@@ -207,135 +319,226 @@ class PDFService:
     #     ]
     #     return holdings
 
-    async def sync_holdings(self, db: Session, user_id: int) -> List[Holding]:
+    async def sync_holdings(self, db: AsyncSession, user_id: int) -> Dict[str, int]:
         """
         Sync holdings from PDF statement.
         If PDF is missing, load demo data with trending stocks.
         """
-        # Clear existing holdings
-        db.query(Holding).filter(Holding.user_id == user_id).delete()
-        db.commit()
-
-        pdf_path = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'Statement10312025.pdf')
-        
         # Check if PDF exists
-        if not os.path.exists(pdf_path):
-            print(f"PDF not found at {pdf_path}. Loading demo data with trending stocks...")
+        if not os.path.exists(self.pdf_path):
+            print(f"PDF not found at {self.pdf_path}. Loading demo data with trending stocks...")
             return await _load_demo_holdings(db, user_id)
         
         # Parse PDF if it exists
         try:
-            # Use the hardcoded/parsed holdings from parse_pdf_holdings
-            holdings_data = self.parse_pdf_holdings()
+            # pdfplumber is CPU-bound; keep it off the event loop
+            holdings_data = await asyncio.to_thread(self.parse_pdf_holdings)
             
             if not holdings_data:
                 print("No holdings found. Loading demo data...")
                 return await _load_demo_holdings(db, user_id)
             
-            # Create holdings from data
-            holdings = []
-            for data in holdings_data:
-                holding = Holding(
-                    user_id=user_id,
-                    symbol=data['symbol'],
-                    name=data['name'],
-                    quantity=data['quantity'],
-                    avg_cost=data['avg_cost'],
-                    sector=data.get('sector', 'Technology')
-                )
-                db.add(holding)
-                holdings.append(holding)
-            
-            db.commit()
-            
-            # Refresh to get IDs
-            for holding in holdings:
-                db.refresh(holding)
-            
-            return holdings
+            return await self.upsert_holdings(db, user_id, holdings_data)
         except Exception as e:
             print(f"Error syncing holdings: {e}. Loading demo data...")
-            db.rollback()
+            await db.rollback()
             return await _load_demo_holdings(db, user_id)
 
+    async def upsert_holdings(self, db: AsyncSession, user_id: int, holdings_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Makes a user's holdings match `holdings_data` in one transaction.
+        Rows are matched by symbol and only inserted, updated or deleted where
+        something changed, so re-syncing an unchanged statement writes nothing
+        and readers never see a half-synced portfolio. Nothing is re-read
+        after the commit; returns how many rows were inserted/updated/deleted.
+        """
+        incoming = {h['symbol']: h for h in merge_statement_holdings([holdings_data])}
+
+        existing: Dict[str, Holding] = {}
+        deleted = 0
+        result = await db.execute(select(Holding).where(Holding.user_id == user_id))
+        for holding in result.scalars():
+            if holding.symbol in incoming and holding.symbol not in existing:
+                existing[holding.symbol] = holding
+            else:
+                # Sold, or a duplicate row left by the old delete-and-insert sync
+                await db.delete(holding)
+                deleted += 1
+
+        new_rows = []
+        updated = 0
+        for symbol, data in incoming.items():
+            values = {
+                "name": data['name'],
+                "quantity": data['quantity'],
+                "avg_cost": data['avg_cost'],
+                "sector": data.get('sector', 'Technology'),
+            }
+            holding = existing.get(symbol)
+            if holding is None:
+                new_rows.append({"user_id": user_id, "symbol": symbol, **values})
+                continue
+            changed = False
+            for field, value in values.items():
+                if getattr(holding, field) != value:
+                    setattr(holding, field, value)
+                    changed = True
+            updated += changed
+
+        # Deletes and updates go out first; new rows are a single executemany
+        # (unit-of-work inserts go row by row on SQLite to fetch each id)
+        await db.flush()
+        if new_rows:
+            await db.execute(insert(Holding), new_rows)
+        await db.commit()
+        return {"inserted": len(new_rows), "updated": updated, "deleted": deleted}
+
+
+# pdfium isn't thread-safe, and parse_pdf_holdings runs in several worker
+# threads at once; every pdfium call goes through this lock
+_pdfium_lock = threading.Lock()
+
+
+class StatementScan(NamedTuple):
+    pages: List[int]
+    broker: Optional[str]
+
 
-async def _load_demo_holdings(db: Session, user_id: int) -> List[Holding]:
+def scan_statement(pdf_path: str) -> StatementScan:
+    """
+    Pre-scan: 0-based numbers of holdings pages, plus the broker detected
+    from the statement text. Uses pdfium's native text extraction, which is
+    far cheaper than pdfplumber's layout analysis. Returns no pages if the
+    PDF can't be scanned.
+    """
+    with _pdfium_lock:
+        return _scan_statement(pdf_path)
+
+
+def _scan_statement(pdf_path: str) -> StatementScan:
+    try:
+        pdf = pypdfium2.PdfDocument(pdf_path)
+    except Exception as e:
+        print(f"Pre-scan failed for {pdf_path}: {e}")
+        return StatementScan([], None)
+    try:
+        pages = []
+        broker = None
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+                if broker is None:
+                    broker = detect_broker(text)
+                if is_holdings_page(text):
+                    pages.append(index)
+            finally:
+                textpage.close()
+                page.close()
+        return StatementScan(pages, broker)
+    finally:
+        pdf.close()
+
+
+def extract_holdings_from_pages(
+    pdf_path: str, page_numbers: List[int], broker: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Process-pool entry point for page-level parallel extraction."""
+    return pdf_service._extract_pages(pdf_path, page_numbers, broker)
+
+
+def parse_statement_file(pdf_path: str) -> List[Dict[str, Any]]:
+    """
+    Process-pool entry point: parses one statement in a worker process.
+    Module-level so it can be pickled by ProcessPoolExecutor. Uploads are
+    parsed once and then deleted, so nothing is hashed or cached, and pages
+    aren't fanned out again from inside the worker.
+    """
+    return pdf_service._extract_holdings(pdf_path, parallel=False)
+
+
+def merge_statement_holdings(statements: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Combines holdings from several statements into one row per symbol:
+    quantities are summed and avg_cost is the cost-weighted average.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for holdings in statements:
+        for h in holdings:
+            row = merged.get(h['symbol'])
+            if row is None:
+                merged[h['symbol']] = dict(h)
+                continue
+            total_quantity = row['quantity'] + h['quantity']
+            if total_quantity > 0:
+                row['avg_cost'] = round(
+                    (row['quantity'] * row['avg_cost'] + h['quantity'] * h['avg_cost']) / total_quantity, 2
+                )
+            row['quantity'] = total_quantity
+    return list(merged.values())
+
+
+DEMO_HOLDINGS = [
+    {
+        'symbol': 'NVDA',
+        'name': 'NVIDIA Corporation',
+        'quantity': 50,
+        'avg_cost': 450.00,
+        'sector': 'Technology'
+    },
+    {
+        'symbol': 'AMD',
+        'name': 'Advanced Micro Devices',
+        'quantity': 100,
+        'avg_cost': 125.00,
+        'sector': 'Technology'
+    },
+    {
+        'symbol': 'TSLA',
+        'name': 'Tesla Inc',
+        'quantity': 25,
+        'avg_cost': 240.00,
+        'sector': 'Automotive'
+    },
+    {
+        'symbol': 'AAPL',
+        'name': 'Apple Inc',
+        'quantity': 75,
+        'avg_cost': 180.00,
+        'sector': 'Technology'
+    },
+    {
+        'symbol': 'MSFT',
+        'name': 'Microsoft Corporation',
+        'quantity': 60,
+        'avg_cost': 350.00,
+        'sector': 'Technology'
+    },
+    {
+        'symbol': 'GOOGL',
+        'name': 'Alphabet Inc',
+        'quantity': 40,
+        'avg_cost': 140.00,
+        'sector': 'Technology'
+    },
+    {
+        'symbol': 'META',
+        'name': 'Meta Platforms Inc',
+        'quantity': 30,
+        'avg_cost': 320.00,
+        'sector': 'Technology'
+    },
+]
+
+
+async def _load_demo_holdings(db: AsyncSession, user_id: int) -> Dict[str, int]:
     """
     Load demo holdings with trending stocks.
     """
-    demo_holdings_data = [
-        {
-            'symbol': 'NVDA',
-            'name': 'NVIDIA Corporation',
-            'quantity': 50,
-            'avg_cost': 450.00,
-            'sector': 'Technology'
-        },
-        {
-            'symbol': 'AMD',
-            'name': 'Advanced Micro Devices',
-            'quantity': 100,
-            'avg_cost': 125.00,
-            'sector': 'Technology'
-        },
-        {
-            'symbol': 'TSLA',
-            'name': 'Tesla Inc',
-            'quantity': 25,
-            'avg_cost': 240.00,
-            'sector': 'Automotive'
-        },
-        {
-            'symbol': 'AAPL',
-            'name': 'Apple Inc',
-            'quantity': 75,
-            'avg_cost': 180.00,
-            'sector': 'Technology'
-        },
-        {
-            'symbol': 'MSFT',
-            'name': 'Microsoft Corporation',
-            'quantity': 60,
-            'avg_cost': 350.00,
-            'sector': 'Technology'
-        },
-        {
-            'symbol': 'GOOGL',
-            'name': 'Alphabet Inc',
-            'quantity': 40,
-            'avg_cost': 140.00,
-            'sector': 'Technology'
-        },
-        {
-            'symbol': 'META',
-            'name': 'Meta Platforms Inc',
-            'quantity': 30,
-            'avg_cost': 320.00,
-            'sector': 'Technology'
-        },
-    ]
-    
-    holdings = []
-    for data in demo_holdings_data:
-        holding = Holding(
-            user_id=user_id,
-            symbol=data['symbol'],
-            name=data['name'],
-            quantity=data['quantity'],
-            avg_cost=data['avg_cost'],
-            sector=data['sector']
-        )
-        db.add(holding)
-        holdings.append(holding)
-    
-    db.commit()
-    
-    # Refresh to get IDs
-    for holding in holdings:
-        db.refresh(holding)
-    
-    print(f"Loaded {len(holdings)} demo holdings with trending stocks")
-    return holdings
+    changes = await pdf_service.upsert_holdings(db, user_id, DEMO_HOLDINGS)
+    print(f"Loaded {len(DEMO_HOLDINGS)} demo holdings with trending stocks")
+    return changes
 
 
 pdf_service = PDFService()
@@ -0,0 +1,109 @@
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+from app.services.valuation_service import PortfolioValuation
+
+
+class _UserTotals:
+    def __init__(self, source: Optional[Hashable]):
+        self.source = source
+        # symbol -> sector -> quantity, so a tick touches only that symbol's lots
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.prices: Dict[str, float] = {}
+        self.total_value = 0.0
+        self.total_cost = 0.0
+        self.sector_values: Dict[str, float] = {}
+
+
+class PortfolioAggregator:
+    """
+    Running per-user portfolio totals kept current by price ticks.
+
+    A full valuation seeds the totals; after that each quote change only
+    adjusts the users holding that symbol (quantity * price delta), so
+    reading a summary never re-values the whole portfolio.
+    """
+
+    def __init__(self):
+        self._users: Dict[int, _UserTotals] = {}
+        # symbol -> users holding it
+        self._holders: Dict[str, Set[int]] = {}
+
+    def load(self, user_id: int, valuation: PortfolioValuation, source: Optional[Hashable] = None) -> None:
+        """
+        (Re)seed a user's totals from a full valuation. `source` identifies the
+        holdings it was built from; summary() ignores totals from another source.
+        """
+        self.drop(user_id)
+        totals = _UserTotals(source)
+
+        sectors = valuation.sector_names[valuation.sector_codes].tolist()
+        for symbol, sector, quantity, price in zip(
+            valuation.symbols, sectors, valuation.quantity.tolist(), valuation.price.tolist()
+        ):
+            by_sector = totals.positions.setdefault(symbol, {})
+            by_sector[sector] = by_sector.get(sector, 0.0) + quantity
+            totals.prices[symbol] = price
+            self._holders.setdefault(symbol, set()).add(user_id)
+
+        totals.total_value = valuation.total_value
+        totals.total_cost = valuation.total_cost
+        totals.sector_values = {
+            str(name): float(value) for name, value in zip(valuation.sector_names, valuation.sector_values)
+        }
+        self._users[user_id] = totals
+
+    def drop(self, user_id: int) -> None:
+        totals = self._users.pop(user_id, None)
+        if totals is None:
+            return
+        for symbol in totals.positions:
+            holders = self._holders.get(symbol)
+            if holders is not None:
+                holders.discard(user_id)
+                if not holders:
+                    del self._holders[symbol]
+
+    def apply_price(self, symbol: str, price: float) -> None:
+        """Apply a new price for `symbol` to every user holding it."""
+        for user_id in self._holders.get(symbol, ()):
+            totals = self._users[user_id]
+            delta_price = price - totals.prices[symbol]
+            if delta_price == 0:
+                continue
+            for sector, quantity in totals.positions[symbol].items():
+                delta = quantity * delta_price
+                totals.total_value += delta
+                totals.sector_values[sector] = totals.sector_values.get(sector, 0.0) + delta
+            totals.prices[symbol] = price
+
+    def positions(self, user_id: int) -> Dict[str, Tuple[float, float]]:
+        """symbol -> (total quantity, last price) for a loaded user."""
+        totals = self._users.get(user_id)
+        if totals is None:
+            return {}
+        return {
+            symbol: (sum(by_sector.values()), totals.prices[symbol])
+            for symbol, by_sector in totals.positions.items()
+        }
+
+    def summary(self, user_id: int, source: Optional[Hashable] = None) -> Optional[Dict[str, Any]]:
+        """Current totals for a user, or None if not loaded (or loaded from a different source)."""
+        totals = self._users.get(user_id)
+        if totals is None or totals.source != source:
+            return None
+
+        total_pl = totals.total_value - totals.total_cost
+        sector_allocation = {}
+        if totals.total_value > 0:
+            for sector, value in sorted(totals.sector_values.items(), key=lambda kv: -kv[1]):
+                sector_allocation[sector] = round(value / totals.total_value * 100, 2)
+
+        return {
+            "total_value": totals.total_value,
+            "total_cost": totals.total_cost,
+            "total_pl": total_pl,
+            "total_pl_percent": (total_pl / totals.total_cost) * 100 if totals.total_cost > 0 else 0.0,
+            "sector_allocation": sector_allocation,
+        }
+
+
+portfolio_aggregator = PortfolioAggregator()
@@ -0,0 +1,256 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional, Tuple
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy import insert
+from app.config import get_settings
+from app.database import ReadSessionLocal, SessionLocal
+from app.models import QuoteSnapshot, PriceRollup
+
+settings = get_settings()
+
+RESOLUTIONS = ("1m", "1h", "1d")
+
+
+def bucket_start(at: datetime, resolution: str) -> datetime:
+    if resolution == "1m":
+        return at.replace(second=0, microsecond=0)
+    if resolution == "1h":
+        return at.replace(minute=0, second=0, microsecond=0)
+    if resolution == "1d":
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown resolution {resolution}")
+
+
+def _log_flush_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Price history flush failed: {task.exception()}")
+
+
+class PriceHistoryService:
+    """
+    Time-series store for quote prices.
+
+    Ticks are buffered in memory by record() (called on every upstream
+    quote) and written in one transaction by flush(): raw rows go to
+    quote_snapshots and each tick is folded into 1m/1h/1d OHLC rollups,
+    so trend queries read a handful of pre-aggregated bars instead of
+    scanning raw ticks.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[str, float, datetime]] = []
+        # (symbols, days, utc date) -> daily closes; past days never change
+        self._closes_cache = TTLCache(maxsize=256, ttl=300)
+        self._last_prune: Optional[datetime] = None
+        # One write at a time, so concurrent flushes never race on the same bar
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._overflow_flush: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PRICE_HISTORY_FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Price history flush failed: {e}")
+
+    def record(self, symbol: str, price: float, at: Optional[datetime] = None) -> None:
+        self._pending.append((symbol, price, at or datetime.utcnow()))
+        # Don't let a burst of ticks pile up until the next timed flush
+        if len(self._pending) >= settings.PRICE_HISTORY_MAX_PENDING and (
+            self._overflow_flush is None or self._overflow_flush.done()
+        ):
+            try:
+                self._overflow_flush = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                return  # No loop (scripts): the caller flushes
+            self._overflow_flush.add_done_callback(_log_flush_failure)
+
+    async def flush(self) -> int:
+        """Persist buffered ticks. Returns the number written."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            ticks, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, ticks)
+            return len(ticks)
+
+    def _write(self, ticks: List[Tuple[str, float, datetime]]) -> None:
+        ticks.sort(key=lambda t: t[2])
+
+        # Fold ticks into bars in memory first: one row touched per bucket, not per tick
+        bars: Dict[Tuple[str, str, datetime], List[float]] = {}
+        for symbol, price, at in ticks:
+            for resolution in RESOLUTIONS:
+                key = (symbol, resolution, bucket_start(at, resolution))
+                bar = bars.get(key)
+                if bar is None:
+                    bars[key] = [price, price, price, price, 1]
+                else:
+                    bar[1] = max(bar[1], price)
+                    bar[2] = min(bar[2], price)
+                    bar[3] = price
+                    bar[4] += 1
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                insert(QuoteSnapshot),
+                [{"symbol": s, "price": p, "captured_at": at} for s, p, at in ticks],
+            )
+
+            symbols = {key[0] for key in bars}
+            for resolution in RESOLUTIONS:
+                buckets = {key[2] for key in bars if key[1] == resolution}
+                existing = {
+                    (row.symbol, row.resolution, row.bucket_start): row
+                    for row in db.query(PriceRollup).filter(
+                        PriceRollup.resolution == resolution,
+                        PriceRollup.symbol.in_(symbols),
+                        PriceRollup.bucket_start.in_(buckets),
+                    )
+                }
+                new_rows = []
+                for key, (open_, high, low, close, samples) in bars.items():
+                    if key[1] != resolution:
+                        continue
+                    row = existing.get(key)
+                    if row is None:
+                        new_rows.append({
+                            "symbol": key[0], "resolution": resolution, "bucket_start": key[2],
+                            "open": open_, "high": high, "low": low, "close": close, "samples": samples,
+                        })
+                    else:
+                        row.high = max(row.high, high)
+                        row.low = min(row.low, low)
+                        row.close = close
+                        row.samples += samples
+                if new_rows:
+                    db.execute(insert(PriceRollup), new_rows)
+
+            self._prune(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _prune(self, db) -> None:
+        # Retention runs at most hourly; 1d bars are kept indefinitely
+        now = datetime.utcnow()
+        if self._last_prune and now - self._last_prune < timedelta(hours=1):
+            return
+        self._last_prune = now
+        db.query(QuoteSnapshot).filter(
+            QuoteSnapshot.captured_at < now - timedelta(days=settings.PRICE_HISTORY_RAW_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+        for resolution, days in (
+            ("1m", settings.PRICE_HISTORY_MINUTE_RETENTION_DAYS),
+            ("1h", settings.PRICE_HISTORY_HOURLY_RETENTION_DAYS),
+        ):
+            db.query(PriceRollup).filter(
+                PriceRollup.resolution == resolution,
+                PriceRollup.bucket_start < now - timedelta(days=days),
+            ).delete(synchronize_session=False)
+
+    def get_rollups(self, symbol: str, resolution: str, since: datetime) -> List[PriceRollup]:
+        db = ReadSessionLocal()
+        try:
+            return (
+                db.query(PriceRollup)
+                .filter(
+                    PriceRollup.symbol == symbol,
+                    PriceRollup.resolution == resolution,
+                    PriceRollup.bucket_start >= since,
+                )
+                .order_by(PriceRollup.bucket_start)
+                .all()
+            )
+        finally:
+            db.close()
+
+    def _daily_closes(self, symbols: Tuple[str, ...], days: List[datetime]) -> np.ndarray:
+        """symbols x days matrix of 1d closes, NaN where no bar exists."""
+        closes = np.full((len(symbols), len(days)), np.nan)
+        if not symbols or not days:
+            return closes
+        row_index = {s: i for i, s in enumerate(symbols)}
+        col_index = {d: j for j, d in enumerate(days)}
+        db = ReadSessionLocal()
+        try:
+            rows = db.query(PriceRollup.symbol, PriceRollup.bucket_start, PriceRollup.close).filter(
+                PriceRollup.resolution == "1d",
+                PriceRollup.symbol.in_(symbols),
+                PriceRollup.bucket_start >= days[0],
+                PriceRollup.bucket_start <= days[-1],
+            )
+            for symbol, day, close in rows:
+                j = col_index.get(day)
+                if j is not None:
+                    closes[row_index[symbol], j] = close
+        finally:
+            db.close()
+        return closes
+
+    async def portfolio_trend(
+        self,
+        positions: Mapping[str, Tuple[float, float]],
+        current_value: float,
+        days: int = 7,
+    ) -> List[float]:
+        """
+        Daily portfolio values for the last `days` days, oldest first, ending
+        with `current_value`. `positions` maps symbol -> (quantity, current price).
+        Past days use 1d closes, carried forward over gaps and back to days
+        before the first bar; symbols with no history yet use today's price.
+        """
+        today = bucket_start(datetime.utcnow(), "1d")
+        past_days = [today - timedelta(days=n) for n in range(days - 1, 0, -1)]
+        symbols = tuple(sorted(positions))
+
+        cache_key = (symbols, days, today)
+        closes = self._closes_cache.get(cache_key)
+        if closes is None:
+            closes = await asyncio.to_thread(self._daily_closes, symbols, past_days)
+            self._closes_cache[cache_key] = closes
+
+        if not symbols:
+            return [current_value] * days
+
+        quantity = np.array([positions[s][0] for s in symbols])
+        price_now = np.array([positions[s][1] for s in symbols])
+
+        # Fill days with no bar from the previous close, leading days from the first close,
+        # and symbols with no history at all from today's price
+        filled = closes.copy()
+        for j in range(1, filled.shape[1]):
+            gap = np.isnan(filled[:, j])
+            filled[gap, j] = filled[gap, j - 1]
+        for j in range(filled.shape[1] - 2, -1, -1):
+            gap = np.isnan(filled[:, j])
+            filled[gap, j] = filled[gap, j + 1]
+        filled = np.where(np.isnan(filled), price_now[:, None], filled)
+
+        return (quantity @ filled).tolist() + [current_value]
+
+
+price_history_service = PriceHistoryService()
@@ -0,0 +1,92 @@
+import asyncio
+import os
+from typing import List, Optional, Set
+from app.config import get_settings
+from app.database import ReadSessionLocal
+from app.models import Holding
+from app.services.market_service import market_service
+from app.services.pdf_service import pdf_service
+from app.services.profile_cache import profile_cache
+from app.services.quote_cache import quote_cache
+
+settings = get_settings()
+
+
+class PriceRefreshScheduler:
+    """
+    Keeps quotes for every held symbol warm in the background.
+
+    Each cycle collects the union of symbols across all Holding rows (plus
+    the statement-backed portfolio), picks those that are missing from the
+    quote cache or would go stale before the next cycle, and refreshes them
+    in batches. Company profiles for the same symbols are loaded into the
+    profile cache and re-fetched once a day; that part runs even with
+    PRICE_REFRESH_ENABLED off. Request handlers then read
+    warm cache entries instead of waiting on Finnhub.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        # Always runs: profiles are refreshed even when quote refresh is disabled
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                print(f"Background price refresh failed: {e}")
+            await asyncio.sleep(settings.PRICE_REFRESH_INTERVAL_SECONDS)
+
+    async def refresh_once(self) -> int:
+        """Run one refresh cycle. Returns how many quotes were refreshed."""
+        symbols = await asyncio.to_thread(self._held_symbols)
+        # Profiles first so freshly loaded quotes get names and caps; also any symbol a quote asked about
+        wanted = profile_cache.take_wanted()
+        try:
+            await market_service.refresh_profiles(sorted(symbols | wanted))
+        except Exception as e:
+            print(f"Profile refresh failed: {e}")
+            for symbol in wanted:
+                profile_cache.want(symbol)
+
+        if not settings.PRICE_REFRESH_ENABLED:
+            return 0
+        # Plus uncached symbols the cache-only endpoints were asked for
+        symbols |= market_service.take_wanted()
+        # Anything still fresh past the next cycle can wait
+        due = [s for s in sorted(symbols) if quote_cache.needs_refresh(s, settings.PRICE_REFRESH_INTERVAL_SECONDS)]
+
+        batch_size = max(1, settings.PRICE_REFRESH_BATCH_SIZE)
+        for start in range(0, len(due), batch_size):
+            batch = await market_service.refresh_quotes(due[start:start + batch_size])
+            if batch.errors:
+                print(f"Background price refresh: {len(batch.errors)} symbols failed")
+        return len(due)
+
+    def _held_symbols(self) -> Set[str]:
+        # Runs in a worker thread: sync DB and PDF access stay off the event loop
+        db = ReadSessionLocal()
+        try:
+            rows: List[tuple] = db.query(Holding.symbol).distinct().all()
+        finally:
+            db.close()
+        symbols = {row[0].upper() for row in rows if row[0]}
+        if os.path.exists(pdf_service.pdf_path):
+            symbols.update(h["symbol"].upper() for h in pdf_service.parse_pdf_holdings())
+        return symbols
+
+
+price_refresh_scheduler = PriceRefreshScheduler()
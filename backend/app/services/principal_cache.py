@@ -0,0 +1,78 @@
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+from cachetools import TLRUCache
+from sqlalchemy import event, inspect
+from app.config import get_settings
+from app.models import User
+
+settings = get_settings()
+
+PrincipalKey = Tuple[str, int]  # (token sub, token exp)
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users, so a repeat request with the
+    same bearer token skips both JWT verification and the user lookup.
+
+    Tokens map to their verified (sub, exp); (sub, exp) maps to the user
+    loaded for it. Entries live for AUTH_PRINCIPAL_CACHE_TTL_SECONDS but
+    never past the token's own exp. Cached users are detached ORM rows and
+    must be treated as read-only. invalidate() drops every entry for a user;
+    it runs automatically whenever a User row is updated or deleted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._ttl = ttl
+        # raw token -> (sub, exp); the exact string was verified when stored
+        self._tokens = TLRUCache(maxsize=maxsize, ttu=lambda _token, key, now: min(now + self._ttl, key[1]), timer=time.time)
+        self._principals = TLRUCache(maxsize=maxsize, ttu=lambda key, _user, now: min(now + self._ttl, key[1]), timer=time.time)
+        self._keys_by_sub: Dict[str, Set[PrincipalKey]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Any]:
+        key = self._tokens.get(token)
+        user = self._principals.get(key) if key is not None else None
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def set(self, token: str, sub: str, exp: int, user: Any) -> None:
+        if self._ttl <= 0:
+            return
+        key = (sub, int(exp))
+        self._tokens[token] = key
+        self._principals[key] = user
+        keys = self._keys_by_sub.setdefault(sub, set())
+        # Forget keys that already expired so this index doesn't grow
+        keys.intersection_update(k for k in keys if k in self._principals)
+        keys.add(key)
+
+    def invalidate(self, sub: str) -> None:
+        """Drop every cached principal for `sub` (the user's email)."""
+        for key in self._keys_by_sub.pop(sub, ()):
+            self._principals.pop(key, None)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._principals.clear()
+        self._keys_by_sub.clear()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target) -> None:
+    # Deactivation, password or profile changes must not be served from cache;
+    # on an email change, tokens were issued for the old address
+    principal_cache.invalidate(target.email)
+    for email in inspect(target).attrs.email.history.deleted or ():
+        principal_cache.invalidate(email)
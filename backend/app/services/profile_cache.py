@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy import insert, select, update
+from app.config import get_settings
+from app.database import ReadSessionLocal, SessionLocal
+from app.models import CompanyProfile
+
+settings = get_settings()
+
+# Symbols per IN (...) query, under SQLite's bound-parameter limit
+SYMBOL_CHUNK = 500
+
+
+class Profile(NamedTuple):
+    name: Optional[str]
+    market_cap: Optional[float]  # USD
+    updated_at: datetime  # UTC
+
+
+def format_market_cap(value: Optional[float]) -> str:
+    """Compact USD market cap, e.g. 2.9T, 150.3B, 850.0M; "N/A" when unknown."""
+    if not value or value <= 0:
+        return "N/A"
+    for divisor, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M")):
+        if value >= divisor:
+            return f"{round(value / divisor, 1)}{suffix}"
+    return f"{round(value / 1e6, 2)}M"
+
+
+class ProfileCache:
+    """
+    Company profiles (name, market cap) by symbol.
+
+    Backed by the company_profiles table and held fully in memory, so
+    enriching a quote is a dict lookup. Rows are loaded in bulk for many
+    symbols at once; symbols asked for but not in memory are remembered
+    and picked up by the next background refresh, which also re-fetches
+    profiles older than PROFILE_REFRESH_INTERVAL_SECONDS from upstream
+    (see MarketService.refresh_profiles).
+    """
+
+    def __init__(self):
+        self._profiles: Dict[str, Profile] = {}
+        self._wanted: Set[str] = set()
+
+    def get(self, symbol: str) -> Optional[Profile]:
+        """Profile from memory. A miss queues the symbol for the next refresh; nothing is loaded here."""
+        profile = self._profiles.get(symbol)
+        if profile is None:
+            self.want(symbol)
+        return profile
+
+    def want(self, symbol: str) -> None:
+        """Queue `symbol` for the next refresh; the queue is capped so it can't grow without bound."""
+        if len(self._wanted) < settings.PROFILE_REFRESH_QUEUE_MAXSIZE:
+            self._wanted.add(symbol)
+
+    def take_wanted(self) -> Set[str]:
+        wanted, self._wanted = self._wanted, set()
+        return wanted
+
+    def due_blocking(self, symbols: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        """
+        Loads stored profiles for `symbols` not yet in memory and returns the
+        symbols whose profile is missing or older than the refresh interval.
+        Call off the event loop.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        self._load([s for s in symbols if s not in self._profiles])
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.PROFILE_REFRESH_INTERVAL_SECONDS)
+        return [s for s in symbols if s not in self._profiles or self._profiles[s].updated_at < cutoff]
+
+    def _load(self, symbols: List[str]) -> None:
+        if not symbols:
+            return
+        db = ReadSessionLocal()
+        try:
+            for start in range(0, len(symbols), SYMBOL_CHUNK):
+                rows = db.execute(
+                    select(CompanyProfile.symbol, CompanyProfile.name, CompanyProfile.market_cap, CompanyProfile.updated_at)
+                    .where(CompanyProfile.symbol.in_(symbols[start:start + SYMBOL_CHUNK]))
+                )
+                for symbol, name, market_cap, updated_at in rows:
+                    self._profiles[symbol] = Profile(name, market_cap, updated_at)
+        finally:
+            db.close()
+
+    def store_blocking(self, profiles: Dict[str, Profile]) -> None:
+        """Persists `profiles` (insert or overwrite) in one transaction and updates memory. Call off the event loop."""
+        if not profiles:
+            return
+        rows = [
+            {"symbol": symbol, "name": p.name, "market_cap": p.market_cap, "updated_at": p.updated_at}
+            for symbol, p in profiles.items()
+        ]
+        db = SessionLocal()
+        try:
+            existing = set()
+            symbols = list(profiles)
+            for start in range(0, len(symbols), SYMBOL_CHUNK):
+                existing.update(db.scalars(
+                    select(CompanyProfile.symbol).where(CompanyProfile.symbol.in_(symbols[start:start + SYMBOL_CHUNK]))
+                ))
+            updates = [row for row in rows if row["symbol"] in existing]
+            inserts = [row for row in rows if row["symbol"] not in existing]
+            # Bulk UPDATE by primary key and one executemany INSERT
+            if updates:
+                db.execute(update(CompanyProfile), updates)
+            if inserts:
+                db.execute(insert(CompanyProfile), inserts)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._profiles.update(profiles)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,142 @@
+import time
+from datetime import datetime, time as dt_time
+from typing import Dict, NamedTuple, Optional
+from zoneinfo import ZoneInfo
+from cachetools import TLRUCache
+from app.config import get_settings
+from app.schemas import StockQuote
+
+settings = get_settings()
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+
+class CachedQuote(NamedTuple):
+    quote: StockQuote
+    fetched_at: float  # time.monotonic() when stored
+    ttl: float  # seconds the quote counts as fresh
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.fetched_at < self.ttl
+
+
+class _CountingTLRUCache(TLRUCache):
+    """TLRUCache that counts entries pushed out for capacity, not expiry."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+def is_market_hours(now: Optional[datetime] = None) -> bool:
+    """Regular NYSE session, Mon-Fri 9:30-16:00 Eastern. Holidays are not considered."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+class QuoteCache:
+    """
+    Quote cache with a per-symbol freshness policy and hit/miss counters.
+
+    Each entry is fresh for a TTL picked when it is stored (shorter for
+    equities during the session, longer for ETFs and after hours), then kept
+    for QUOTE_STALE_TTL_SECONDS more so it can be served stale while a
+    refresh runs.
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries = _CountingTLRUCache(
+            maxsize=maxsize,
+            ttu=lambda _key, entry, now: now + entry.ttl + settings.QUOTE_STALE_TTL_SECONDS,
+        )
+        self._etf_symbols = {s.upper() for s in settings.ETF_SYMBOLS}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.refresh_seconds_total = 0.0
+        self.refresh_seconds_max = 0.0
+
+    def ttl_for(self, symbol: str, now: Optional[datetime] = None) -> float:
+        if not is_market_hours(now):
+            return settings.QUOTE_CACHE_AFTER_HOURS_TTL_SECONDS
+        if symbol in self._etf_symbols:
+            return settings.QUOTE_CACHE_ETF_TTL_SECONDS
+        return settings.QUOTE_CACHE_TTL_SECONDS
+
+    def get(self, symbol: str) -> Optional[CachedQuote]:
+        entry = self._entries.get(symbol)
+        if entry is None:
+            self.misses += 1
+        elif entry.is_fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def peek(self, symbol: str) -> Optional[StockQuote]:
+        """Cached quote (fresh or stale) without counting a lookup."""
+        entry = self._entries.get(symbol)
+        return entry.quote if entry is not None else None
+
+    def set(self, symbol: str, quote: StockQuote) -> None:
+        self._entries[symbol] = CachedQuote(quote, time.monotonic(), self.ttl_for(symbol))
+
+    def needs_refresh(self, symbol: str, within_seconds: float = 0.0) -> bool:
+        """True if `symbol` is missing or stops being fresh within `within_seconds`. Not counted in stats."""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return True
+        return time.monotonic() + within_seconds >= entry.fetched_at + entry.ttl
+
+    def fresh_for(self, symbol: str) -> float:
+        """Seconds until `symbol`'s cached quote goes stale; 0 if it's stale or missing. Not counted in stats."""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry.fetched_at + entry.ttl - time.monotonic())
+
+    def record_refresh(self, seconds: float, ok: bool = True) -> None:
+        self.refreshes += 1
+        if not ok:
+            self.refresh_errors += 1
+        self.refresh_seconds_total += seconds
+        self.refresh_seconds_max = max(self.refresh_seconds_max, seconds)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self._entries.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self._entries.evictions,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refresh_latency_avg_ms": round(self.refresh_seconds_total / self.refreshes * 1000, 2) if self.refreshes else 0.0,
+            "refresh_latency_max_ms": round(self.refresh_seconds_max * 1000, 2),
+            "market_hours": is_market_hours(),
+        }
+
+
+quote_cache = QuoteCache(maxsize=settings.QUOTE_CACHE_MAXSIZE)
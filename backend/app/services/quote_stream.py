@@ -0,0 +1,134 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+from app.config import get_settings
+from app.services.market_service import market_service
+
+settings = get_settings()
+
+
+class _Subscriber:
+    """
+    One connected client. Pending changes are merged per symbol rather than
+    queued, so a slow client only ever holds the latest value of each field.
+    """
+
+    def __init__(self, symbols: Set[str]):
+        self.symbols = symbols
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.ready = asyncio.Event()
+
+    def push(self, changes: Dict[str, Dict[str, Any]]) -> None:
+        for symbol, fields in changes.items():
+            self.pending.setdefault(symbol, {}).update(fields)
+        self.ready.set()
+
+    def take(self) -> Dict[str, Dict[str, Any]]:
+        changes, self.pending = self.pending, {}
+        self.ready.clear()
+        return changes
+
+
+class QuoteStreamHub:
+    """
+    Fans one upstream quote refresh loop out to every streaming client.
+
+    The loop fetches the union of subscribed symbols once per interval
+    through MarketService's batch path, diffs each quote against the last
+    value broadcast, and hands subscribers only the symbols and fields that
+    changed. Upstream load scales with distinct symbols, not clients.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[_Subscriber] = set()
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, symbols: Iterable[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields {"type": "snapshot", ...} once with full quotes, then
+        {"type": "delta", ...} with changed fields only. Yields
+        {"type": "heartbeat"} when nothing changed for a while.
+        """
+        subscriber = _Subscriber({s.strip().upper() for s in symbols if s.strip()})
+        self._subscribers.add(subscriber)
+        self._ensure_running()
+        try:
+            yield {"type": "snapshot", "quotes": await self._snapshot(subscriber.symbols)}
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), settings.QUOTE_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield {"type": "heartbeat"}
+                    continue
+                yield {"type": "delta", "quotes": subscriber.take()}
+        finally:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers and self._task is not None:
+                # Nobody listening: stop polling upstream until the next subscriber,
+                # and drop the last values so its snapshot isn't served stale
+                self._task.cancel()
+                self._task = None
+                self._last.clear()
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _snapshot(self, symbols: Set[str]) -> Dict[str, Dict[str, Any]]:
+        # Serve what was last broadcast so a new client and the delta stream agree
+        missing = [s for s in symbols if s not in self._last]
+        if missing:
+            batch = await market_service.get_quotes_batch(missing)
+            for symbol, quote in batch.quotes.items():
+                self._last.setdefault(symbol, quote.model_dump())
+        return {s: self._last[s] for s in symbols if s in self._last}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.QUOTE_STREAM_INTERVAL_SECONDS)
+            try:
+                await self._tick()
+            except Exception as e:
+                print(f"Quote stream refresh failed: {e}")
+
+    async def _tick(self) -> None:
+        symbols = set().union(*(sub.symbols for sub in self._subscribers))
+        # Forget symbols nobody watches any more
+        for symbol in list(self._last):
+            if symbol not in symbols:
+                del self._last[symbol]
+        if not symbols:
+            return
+
+        batch = await market_service.get_quotes_batch(list(symbols))
+        changes: Dict[str, Dict[str, Any]] = {}
+        for symbol, quote in batch.quotes.items():
+            current = quote.model_dump()
+            previous = self._last.get(symbol, {})
+            diff = {k: v for k, v in current.items() if previous.get(k) != v}
+            if diff:
+                changes[symbol] = diff
+                self._last[symbol] = current
+
+        if not changes:
+            return
+        for subscriber in list(self._subscribers):
+            relevant = {s: changes[s] for s in subscriber.symbols if s in changes}
+            if relevant:
+                subscriber.push(relevant)
+
+
+quote_stream_hub = QuoteStreamHub()
@@ -0,0 +1,258 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Sequence
+import numpy as np
+
+# Rule scopes: what one row of the evaluated columns stands for
+POSITION = "position"
+SECTOR = "sector"
+PORTFOLIO = "portfolio"
+
+
+class Rows:
+    """
+    Columns for one scope across every portfolio in a batch. `owner` holds
+    each row's portfolio index; other attributes are NumPy arrays of equal
+    length (see PositionBatch for the columns available per scope).
+    """
+
+    def __init__(self, **columns: np.ndarray):
+        self.__dict__.update(columns)
+        self.columns = list(columns)
+
+    def row(self, i: int) -> Dict[str, object]:
+        values = {name: getattr(self, name)[i] for name in self.columns}
+        if "weight" in values:
+            values["weight_pct"] = int(values["weight"] * 100)
+        return values
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A declarative recommendation rule.
+
+    `condition` maps the scope's Rows to a boolean mask; every True row
+    yields one recommendation whose reason is `reason` formatted with that
+    row's values. `symbol` is the ticker to suggest, or None for the row's
+    own symbol (position rules). `score_penalty` is taken off the
+    portfolio's diversification score per hit, and `high_risk` marks the
+    portfolio as high risk.
+    """
+    name: str
+    scope: str
+    condition: Callable[[Rows], np.ndarray]
+    reason: str
+    suggested_action: str
+    risk_level: str
+    symbol: Optional[str] = None
+    score_penalty: int = 0
+    high_risk: bool = False
+
+
+@dataclass
+class Finding:
+    owner: int
+    rule: Rule
+    symbol: str
+    reason: str
+
+
+class PositionBatch:
+    """
+    Positions of many portfolios as flat columns, valued at live prices.
+    Weights, sector totals and per-portfolio figures are all computed with
+    bincounts over the owner index, so one batch of thousands of users costs
+    a handful of array operations.
+
+    Columns per scope:
+      position:  owner, symbol, sector, market_value, weight, pl_percent
+      sector:    owner, sector, market_value, weight
+      portfolio: owner, holdings, total_value, total_cost
+    """
+
+    def __init__(
+        self,
+        owner: np.ndarray,
+        owner_count: int,
+        symbols: Sequence[str],
+        sectors: Sequence[Optional[str]],
+        quantity: np.ndarray,
+        avg_cost: np.ndarray,
+        price: np.ndarray,
+    ):
+        market_value = quantity * price
+        cost_basis = quantity * avg_cost
+        # bincount of an empty batch comes back int64 even with weights; keep money columns float
+        total_value = np.bincount(owner, weights=market_value, minlength=owner_count).astype(np.float64)
+        total_cost = np.bincount(owner, weights=cost_basis, minlength=owner_count).astype(np.float64)
+        holdings = np.bincount(owner, minlength=owner_count)
+
+        def share(values: np.ndarray, owners: np.ndarray) -> np.ndarray:
+            totals = total_value[owners]
+            return np.divide(values, totals, out=np.zeros(len(values), dtype=np.float64), where=totals > 0)
+
+        sector_names, sector_codes = np.unique(
+            np.array([s or "Other" for s in sectors], dtype=object), return_inverse=True
+        )
+        sector_labels = np.array(sector_names, dtype=object)
+
+        self.positions = Rows(
+            owner=owner,
+            symbol=np.array(symbols, dtype=object),
+            sector=sector_labels[sector_codes] if len(sector_codes) else np.array([], dtype=object),
+            market_value=market_value,
+            weight=share(market_value, owner),
+            pl_percent=np.divide(
+                (market_value - cost_basis) * 100, cost_basis, out=np.zeros_like(market_value), where=cost_basis > 0
+            ),
+        )
+
+        # (owner, sector) pairs that actually occur, as one combined integer key
+        pair_keys = owner.astype(np.int64) * max(len(sector_names), 1) + sector_codes
+        pairs, pair_index = np.unique(pair_keys, return_inverse=True)
+        pair_owner = pairs // max(len(sector_names), 1)
+        pair_value = np.bincount(pair_index, weights=market_value, minlength=len(pairs)).astype(np.float64)
+        self.sectors = Rows(
+            owner=pair_owner,
+            sector=sector_labels[pairs % max(len(sector_names), 1)] if len(pairs) else np.array([], dtype=object),
+            market_value=pair_value,
+            weight=share(pair_value, pair_owner),
+        )
+
+        self.portfolios = Rows(
+            owner=np.arange(owner_count),
+            holdings=holdings,
+            total_value=total_value,
+            total_cost=total_cost,
+        )
+        self.owner_count = owner_count
+
+    def rows(self, scope: str) -> Rows:
+        return {POSITION: self.positions, SECTOR: self.sectors, PORTFOLIO: self.portfolios}[scope]
+
+
+class RuleEngine:
+    """Evaluates a list of rules over a PositionBatch, in rule order."""
+
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.rules: List[Rule] = list(rules or [])
+
+    def register(self, rule: Rule) -> Rule:
+        self.rules.append(rule)
+        return rule
+
+    @property
+    def suggested_symbols(self) -> List[str]:
+        """Fixed tickers rules may suggest, so their prices can be fetched with the holdings'."""
+        return sorted({rule.symbol for rule in self.rules if rule.symbol})
+
+    def evaluate(self, batch: PositionBatch):
+        """
+        Returns (findings per owner, diversification score per owner, high-risk flag per owner).
+        """
+        findings: List[List[Finding]] = [[] for _ in range(batch.owner_count)]
+        penalty = np.zeros(batch.owner_count, dtype=np.int64)
+        high_risk = np.zeros(batch.owner_count, dtype=bool)
+
+        for rule in self.rules:
+            rows = batch.rows(rule.scope)
+            hits = np.flatnonzero(rule.condition(rows))
+            if not len(hits):
+                continue
+            owners = rows.owner[hits]
+            np.add.at(penalty, owners, rule.score_penalty)
+            if rule.high_risk:
+                high_risk[owners] = True
+            for i, owner in zip(hits.tolist(), owners.tolist()):
+                values = rows.row(i)
+                findings[owner].append(Finding(
+                    owner=owner,
+                    rule=rule,
+                    symbol=rule.symbol or values["symbol"],
+                    reason=rule.reason.format(**values),
+                ))
+
+        scores = np.maximum(0, 100 - penalty)
+        return findings, scores, high_risk
+
+
+SECTOR_CONCENTRATION_LIMIT = 0.4
+POSITION_CONCENTRATION_LIMIT = 0.25
+MIN_HOLDINGS = 3
+TECH_HEAVY_LIMIT = 0.5
+
+DEFAULT_RULES = [
+    Rule(
+        name="sector_concentration",
+        scope=SECTOR,
+        condition=lambda rows: rows.weight > SECTOR_CONCENTRATION_LIMIT,
+        symbol="VTI",  # Total market ETF
+        reason="High concentration in {sector} ({weight_pct}%). Consider diversifying with a broad market ETF.",
+        suggested_action="Buy",
+        risk_level="Low",
+        score_penalty=30,
+        high_risk=True,
+    ),
+    Rule(
+        name="position_concentration",
+        scope=POSITION,
+        condition=lambda rows: rows.weight > POSITION_CONCENTRATION_LIMIT,
+        reason="Single stock {symbol} makes up {weight_pct}% of portfolio. Consider reducing position size.",
+        suggested_action="Reduce",
+        risk_level="High",
+        score_penalty=10,
+    ),
+    Rule(
+        name="few_holdings",
+        scope=PORTFOLIO,
+        condition=lambda rows: rows.holdings < MIN_HOLDINGS,
+        symbol="QQQ",
+        reason="Portfolio has few holdings. Consider adding tech exposure for growth.",
+        suggested_action="Watch",
+        risk_level="Medium",
+        score_penalty=20,
+    ),
+    Rule(
+        name="tech_heavy",
+        scope=SECTOR,
+        condition=lambda rows: (rows.sector == "Technology") & (rows.weight > TECH_HEAVY_LIMIT),
+        symbol="SCHD",
+        reason="Heavy tech exposure. Consider a dividend ETF for balance.",
+        suggested_action="Buy",
+        risk_level="Low",
+    ),
+]
+
+
+def build_batch(
+    portfolios: Dict[Hashable, List[dict]],
+    prices: Dict[str, float],
+) -> PositionBatch:
+    """
+    PositionBatch from {owner key: holdings rows}. Rows need symbol,
+    quantity, avg_cost and sector; symbols without a price are valued at
+    cost. Owner indexes follow the dict's order.
+    """
+    owner_list, symbols, sectors, quantity, avg_cost = [], [], [], [], []
+    for index, holdings in enumerate(portfolios.values()):
+        for h in holdings:
+            owner_list.append(index)
+            symbols.append(h["symbol"])
+            sectors.append(h.get("sector"))
+            quantity.append(h["quantity"])
+            avg_cost.append(h["avg_cost"])
+
+    quantity_arr = np.array(quantity, dtype=np.float64)
+    avg_cost_arr = np.array(avg_cost, dtype=np.float64)
+    price = np.fromiter((prices.get(s, np.nan) for s in symbols), dtype=np.float64, count=len(symbols))
+    price = np.where(np.isnan(price), avg_cost_arr, price)
+
+    return PositionBatch(
+        owner=np.array(owner_list, dtype=np.int64),
+        owner_count=len(portfolios),
+        symbols=symbols,
+        sectors=sectors,
+        quantity=quantity_arr,
+        avg_cost=avg_cost_arr,
+        price=price,
+    )
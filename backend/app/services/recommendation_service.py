@@ -1,87 +1,65 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Dict, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Holding
 from app.schemas import Recommendation, RecommendationResponse
 from app.services.market_service import market_service
+from app.services.recommendation_rules import DEFAULT_RULES, RuleEngine, build_batch
 
 class RecommendationService:
     """
-    Simple rules-based recommendation engine.
-    """
-
-    async def generate_recommendations(self, db: Session, user_id: int) -> RecommendationResponse:
-        holdings = db.query(Holding).filter(Holding.user_id == user_id).all()
-        
-        recommendations = []
-        portfolio_risk = "Low"
-        diversification_score = 100
+    Rules-based recommendation engine.
 
-        # 1. Check for diversification (Sector concentration)
-        sectors = {}
-        total_value = 0
-        for h in holdings:
-            # We need current price to calculate real weight, but for speed we'll use cost basis or fetch price
-            # For this simple engine, let's use quantity * avg_cost as a proxy for value
-            val = h.quantity * h.avg_cost
-            total_value += val
-            sectors[h.sector] = sectors.get(h.sector, 0) + val
+    Holdings are valued at live prices and evaluated by a RuleEngine over
+    columnar position data; see recommendation_rules for the rules. Any
+    number of users can be evaluated together with one holdings query, one
+    quote batch and one pass per rule.
+    """
 
-        if total_value > 0:
-            for sector, val in sectors.items():
-                weight = val / total_value
-                if weight > 0.4:
-                    recommendations.append(Recommendation(
-                        symbol="VTI", # Total market ETF
-                        reason=f"High concentration in {sector} ({int(weight*100)}%). Consider diversifying with a broad market ETF.",
-                        risk_level="Low",
-                        suggested_action="Buy",
-                        current_price=0 # Frontend will fetch or we can fetch here
-                    ))
-                    portfolio_risk = "High"
-                    diversification_score -= 30
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
 
-        # 2. Check for specific stock concentration
-        for h in holdings:
-            if total_value > 0:
-                weight = (h.quantity * h.avg_cost) / total_value
-                if weight > 0.25:
-                    recommendations.append(Recommendation(
-                        symbol=h.symbol,
-                        reason=f"Single stock {h.symbol} makes up {int(weight*100)}% of portfolio. Consider reducing position size.",
-                        risk_level="High",
-                        suggested_action="Reduce"
-                    ))
-                    diversification_score -= 10
+    async def generate_recommendations(self, db: AsyncSession, user_id: int) -> RecommendationResponse:
+        return (await self.generate_recommendations_batch(db, [user_id]))[user_id]
 
-        # 3. Generic "Growth" suggestions if portfolio is small
-        if len(holdings) < 3:
-             recommendations.append(Recommendation(
-                symbol="QQQ",
-                reason="Portfolio has few holdings. Consider adding tech exposure for growth.",
-                risk_level="Medium",
-                suggested_action="Watch"
-            ))
-             diversification_score -= 20
+    async def generate_recommendations_batch(
+        self, db: AsyncSession, user_ids: Sequence[int]
+    ) -> Dict[int, RecommendationResponse]:
+        # Only the columns in ix_holdings_user_valuation, so the read never touches the table
+        rows = (await db.execute(
+            select(Holding.user_id, Holding.symbol, Holding.quantity, Holding.avg_cost, Holding.sector)
+            .where(Holding.user_id.in_(user_ids))
+        )).all()
+        portfolios: Dict[int, List[dict]] = {user_id: [] for user_id in user_ids}
+        for row in rows:
+            portfolios[row.user_id].append(row._asdict())
 
-        # 4. Value suggestion
-        if "Technology" in sectors and sectors["Technology"] / total_value > 0.5:
-             recommendations.append(Recommendation(
-                symbol="SCHD",
-                reason="Heavy tech exposure. Consider a dividend ETF for balance.",
-                risk_level="Low",
-                suggested_action="Buy"
-            ))
+        # Held symbols and every ticker a rule may suggest, in one batch
+        symbols = {row.symbol for row in rows} | set(self.engine.suggested_symbols)
+        quotes = (await market_service.get_quotes_batch(sorted(symbols))).quotes
+        prices = {symbol: quote.price for symbol, quote in quotes.items()}
 
-        # Fetch current prices for recommendations
-        for rec in recommendations:
-            quote = await market_service.get_quote(rec.symbol)
-            if quote:
-                rec.current_price = quote.current_price
+        findings, scores, high_risk = self.engine.evaluate(build_batch(portfolios, prices))
 
-        return RecommendationResponse(
-            recommendations=recommendations,
-            portfolio_risk_summary=f"Portfolio Risk is {portfolio_risk}. Diversification Score: {max(0, diversification_score)}/100",
-            diversification_score=max(0, diversification_score)
-        )
+        responses = {}
+        for index, user_id in enumerate(portfolios):
+            recommendations = []
+            for finding in findings[index]:
+                quote = quotes.get(finding.symbol)
+                recommendations.append(Recommendation(
+                    symbol=finding.symbol,
+                    reason=finding.reason,
+                    risk_level=finding.rule.risk_level,
+                    suggested_action=finding.rule.suggested_action,
+                    current_price=quote.price if quote else None,
+                ))
+            score = int(scores[index])
+            portfolio_risk = "High" if high_risk[index] else "Low"
+            responses[user_id] = RecommendationResponse(
+                recommendations=recommendations,
+                portfolio_risk_summary=f"Portfolio Risk is {portfolio_risk}. Diversification Score: {score}/100",
+                diversification_score=score,
+            )
+        return responses
 
-recommendation_service = RecommendationService()
+recommendation_service = RecommendationService(RuleEngine(DEFAULT_RULES))
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.config import get_settings
+from app.services.price_history_service import bucket_start, price_history_service
+
+settings = get_settings()
+
+# Calendar days of daily closes behind each score
+WINDOW_DAYS = 365
+# ~3 months of sessions, in calendar days, for momentum
+MOMENTUM_DAYS = 91
+# Symbols per history query, under SQLite's bound-parameter limit
+SYMBOL_CHUNK = 500
+# Score for a feature that can't be computed yet (too little history)
+NEUTRAL = 0.5
+
+
+def trading_day(at: Optional[datetime] = None) -> date:
+    """Session a score belongs to: weekends roll back to Friday's session."""
+    day = (at or datetime.utcnow()).date()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry each row's last finite value forward over NaN gaps."""
+    valid = np.isfinite(values)
+    idx = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    filled[~np.maximum.accumulate(valid, axis=1)] = np.nan
+    return filled
+
+
+def compute_buy_scores(closes: np.ndarray) -> np.ndarray:
+    """
+    Buy scores 0-100 for a symbols x days matrix of daily closes (oldest
+    first, NaN where there's no bar). Three features, each mapped to 0-1:
+
+      value      1 - position of the last close in the window's range
+      momentum   return over the last ~3 months, squashed with tanh
+      stability  1 - annualized volatility of daily log returns, capped
+
+    weighted by BUY_SCORE_WEIGHTS. Features without enough history count
+    as neutral, so a symbol with no history scores 50.
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    n, days = closes.shape
+    with np.errstate(invalid="ignore", divide="ignore"):
+        filled = _forward_fill(closes) if days else closes
+        last = filled[:, -1] if days else np.full(n, np.nan)
+
+        # fmin/fmax skip NaN; a row without bars stays at +/-inf and reads as neutral
+        low = np.fmin.reduce(closes, axis=1, initial=np.inf)
+        high = np.fmax.reduce(closes, axis=1, initial=-np.inf)
+        span = high - low
+        position = np.divide(last - low, span, out=np.full(n, NEUTRAL), where=np.isfinite(span) & (span > 0))
+        value = 1 - position
+
+        lookback = filled[:, -MOMENTUM_DAYS] if days >= MOMENTUM_DAYS else np.full(n, np.nan)
+        momentum_return = np.divide(last, lookback, out=np.full(n, np.nan), where=lookback > 0) - 1
+        momentum = np.where(np.isfinite(momentum_return), 0.5 + 0.5 * np.tanh(momentum_return / 0.25), NEUTRAL)
+
+        # Returns between consecutive bars only; gaps (weekends, holidays) aren't flat days
+        log_close = np.log(np.where(closes > 0, closes, np.nan))
+        previous = _forward_fill(log_close)[:, :-1] if days > 1 else np.zeros((n, 0))
+        returns = log_close[:, 1:] - previous if days > 1 else np.zeros((n, 0))
+        observed = np.isfinite(returns)
+        count = observed.sum(axis=1)
+        sums = np.where(observed, returns, 0).sum(axis=1)
+        mean = np.divide(sums, count, out=np.zeros(n), where=count > 0)
+        squares = np.where(observed, (returns - mean[:, None]) ** 2, 0).sum(axis=1)
+        variance = np.divide(squares, count - 1, out=np.full(n, np.nan), where=count > 2)
+        volatility = np.sqrt(variance * 252)
+        stability = np.where(np.isfinite(volatility), 1 - np.clip(volatility / 0.8, 0, 1), NEUTRAL)
+
+    value_w, momentum_w, stability_w = settings.BUY_SCORE_WEIGHTS
+    total = value_w + momentum_w + stability_w
+    score = (value_w * value + momentum_w * momentum + stability_w * stability) / total
+    return np.clip(np.rint(100 * score), 0, 100).astype(np.int64)
+
+
+class BuyScoreService:
+    """
+    Deterministic buy scores from stored daily history.
+
+    A score only depends on completed daily bars, so it's computed once per
+    symbol per trading day and then served from memory: the same symbol
+    reads the same score all session, whichever path asks for it. Misses
+    are loaded and scored together in one query.
+    """
+
+    def __init__(self):
+        # (symbol, trading day) -> score; only the current day is kept
+        self._memo: Dict[Tuple[str, date], int] = {}
+        self._day: Optional[date] = None
+
+    def _roll(self, day: date) -> None:
+        if day != self._day:
+            self._memo = {key: score for key, score in self._memo.items() if key[1] == day}
+            self._day = day
+
+    def peek(self, symbol: str) -> Optional[int]:
+        """Memoized score for today, without loading anything."""
+        return self._memo.get((symbol, trading_day()))
+
+    def get_scores_blocking(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """Scores for `symbols`, loading uncached ones from the database. Call off the event loop."""
+        day = trading_day()
+        self._roll(day)
+        symbols = list(dict.fromkeys(symbols))
+        missing = tuple(s for s in symbols if (s, day) not in self._memo)
+        if missing:
+            today = bucket_start(datetime.utcnow(), "1d")
+            # Completed sessions only: today's bar moves with every tick
+            days = [today - timedelta(days=n) for n in range(WINDOW_DAYS, 0, -1)]
+            for start in range(0, len(missing), SYMBOL_CHUNK):
+                chunk = missing[start:start + SYMBOL_CHUNK]
+                scores = compute_buy_scores(price_history_service._daily_closes(chunk, days))
+                for symbol, score in zip(chunk, scores.tolist()):
+                    self._memo[(symbol, day)] = score
+        return {s: self._memo[(s, day)] for s in symbols}
+
+    async def get_scores(self, symbols: List[str]) -> Dict[str, int]:
+        day = trading_day()
+        if all((s, day) in self._memo for s in symbols):
+            return {s: self._memo[(s, day)] for s in symbols}
+        return await asyncio.to_thread(self.get_scores_blocking, symbols)
+
+    async def get_score(self, symbol: str) -> int:
+        return (await self.get_scores([symbol]))[symbol]
+
+    def score_series(self, key: str, load_closes: Callable[[], np.ndarray]) -> int:
+        """
+        Memoized score for a caller-supplied close series (e.g. mock history),
+        keyed by `key`. `load_closes` only runs on the day's first request.
+        """
+        day = trading_day()
+        self._roll(day)
+        memo_key = (key, day)
+        if memo_key not in self._memo:
+            self._memo[memo_key] = int(compute_buy_scores(load_closes())[0])
+        return self._memo[memo_key]
+
+
+buy_score_service = BuyScoreService()
@@ -0,0 +1,168 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+
+# Precompiled once at import; every parser works on pdfplumber word boxes, not raw text
+SYMBOL_RE = re.compile(r"^\(([A-Z][A-Z0-9.]{0,9})\)$")
+NUMERIC_RE = re.compile(r"^-?\$?[\d,]*\.?\d+$")
+PLACEHOLDER_RE = re.compile(r"^(-|--|n/?a|unavailable|not\s+applicable)$", re.IGNORECASE)
+
+
+class StatementHolding(NamedTuple):
+    """One position as printed on a statement."""
+    symbol: str
+    name: str
+    quantity: float
+    price: float
+    market_value: float
+    cost_basis: float
+
+
+class StatementParser(ABC):
+    """
+    Base class for broker-specific holdings parsers.
+
+    Subclasses set `name`, implement `detect` (is this statement ours?) and
+    `parse_page` (pdfplumber page -> rows), and register with
+    @register_parser. Registering a subclass without parse_page fails
+    right away, since the decorator instantiates it.
+    """
+    name: str = ""
+    holdings_marker: str = "Holdings"
+
+    def detect(self, text: str) -> bool:
+        return False
+
+    def is_holdings_page(self, text: str) -> bool:
+        return self.holdings_marker in text
+
+    @abstractmethod
+    def parse_page(self, page: Any) -> List[StatementHolding]:
+        """Rows for one pdfplumber page; empty if it isn't a holdings page."""
+
+
+_registry: Dict[str, StatementParser] = {}
+
+
+def register_parser(cls: Type[StatementParser]) -> Type[StatementParser]:
+    _registry[cls.name] = cls()
+    return cls
+
+
+def get_parser(name: Optional[str] = None) -> StatementParser:
+    """Parser by broker name; unknown or missing names get the default (Fidelity)."""
+    return _registry.get(name or "", _registry[DEFAULT_BROKER])
+
+
+def detect_broker(text: str) -> Optional[str]:
+    for name, parser in _registry.items():
+        if parser.detect(text):
+            return name
+    return None
+
+
+def is_holdings_page(text: str) -> bool:
+    return any(parser.is_holdings_page(text) for parser in _registry.values())
+
+
+def _to_float(token: str) -> Optional[float]:
+    if not NUMERIC_RE.match(token):
+        return None
+    return float(token.replace(",", "").replace("$", ""))
+
+
+def _group_lines(words: List[Dict[str, Any]], tolerance: float) -> List[List[Dict[str, Any]]]:
+    """Cluster word boxes into visual lines by their top edge, left to right."""
+    lines: List[List[Dict[str, Any]]] = []
+    for word in sorted(words, key=lambda w: (round(w["top"]), w["x0"])):
+        if lines and abs(lines[-1][0]["top"] - word["top"]) <= tolerance:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    for line in lines:
+        line.sort(key=lambda w: w["x0"])
+    return lines
+
+
+@register_parser
+class FidelityParser(StatementParser):
+    """
+    Fidelity "Holdings" tables. Each position is a description ending in
+    "(SYMBOL)" followed by numeric columns: beginning market value,
+    quantity, price per unit, ending market value, total cost basis,
+    unrealized gain/loss.
+
+    Rows are assembled from word geometry in a single pass over the page's
+    lines, so a description that wraps above the numbers, or a symbol that
+    wraps below them, still yields one row.
+    """
+    name = "fidelity"
+
+    LINE_TOLERANCE = 3.0
+    # Section headings and subtotals never belong to a position's description
+    HEADING_RE = re.compile(
+        r"^(Holdings|Total|Subtotal|Description|Stocks|Common Stock|Exchange Traded|Equity ETPs|"
+        r"Mutual Funds|Bonds|Core Account|Other|Page \d)",
+        re.IGNORECASE,
+    )
+    MIN_COLUMNS = 5
+
+    def detect(self, text: str) -> bool:
+        return "Fidelity" in text or "FIDELITY" in text
+
+    def parse_page(self, page: Any) -> List[StatementHolding]:
+        words = page.extract_words()
+        if not any(w["text"].startswith(self.holdings_marker) for w in words):
+            return []
+
+        rows: List[StatementHolding] = []
+        name_parts: List[str] = []
+        symbol: Optional[str] = None
+        columns: List[Optional[float]] = []
+
+        for line in _group_lines(words, self.LINE_TOLERANCE):
+            first_text = line[0]["text"]
+            if self.HEADING_RE.match(first_text):
+                name_parts, symbol, columns = [], None, []
+                continue
+
+            # Words before the first numeric token are description; the rest are columns
+            split = next(
+                (i for i, w in enumerate(line) if _to_float(w["text"]) is not None or PLACEHOLDER_RE.match(w["text"])),
+                len(line),
+            )
+            line_columns = [_to_float(w["text"]) for w in line[split:]]
+            if len(line_columns) >= self.MIN_COLUMNS and len(columns) >= self.MIN_COLUMNS:
+                # A second set of numbers before any symbol: the earlier block wasn't a position
+                name_parts, symbol = [], None
+                columns = []
+
+            for word in line[:split]:
+                match = SYMBOL_RE.match(word["text"])
+                if match and symbol is None:
+                    symbol = match.group(1)
+                elif symbol is None:
+                    name_parts.append(word["text"])
+            if line_columns:
+                columns = line_columns
+
+            if symbol and len(columns) >= self.MIN_COLUMNS:
+                _, quantity, price, market_value, cost_basis = columns[:5]
+                if quantity is not None and cost_basis is not None:
+                    rows.append(StatementHolding(
+                        symbol=symbol,
+                        name=" ".join(name_parts),
+                        quantity=quantity,
+                        price=price or 0.0,
+                        market_value=market_value or 0.0,
+                        cost_basis=cost_basis,
+                    ))
+                name_parts, symbol, columns = [], None, []
+            elif line_columns and symbol is None and len(line_columns) < self.MIN_COLUMNS:
+                # Stray figures (footnotes, page totals) can't start a position
+                name_parts, columns = [], []
+
+        return rows
+
+
+DEFAULT_BROKER = FidelityParser.name
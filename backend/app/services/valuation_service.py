@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Mapping, Optional
+import numpy as np
+from app.schemas import StockQuote
+
+
+class PortfolioValuation:
+    """
+    Columnar valuation of a set of positions.
+
+    Holdings are held as parallel NumPy arrays (quantity, avg_cost, price,
+    sector code) and every derived figure is computed in one vectorized pass,
+    so cost stays flat in Python overhead whether there are 20 or 20,000 lots.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        sectors: List[Optional[str]],
+        quantity: np.ndarray,
+        avg_cost: np.ndarray,
+        price: np.ndarray,
+    ):
+        self.symbols = symbols
+        self.quantity = quantity
+        self.avg_cost = avg_cost
+        self.price = price
+
+        # Sector labels -> small integer codes so allocation is a single bincount
+        self.sector_names, self.sector_codes = np.unique(
+            np.array([s or "Other" for s in sectors], dtype=object), return_inverse=True
+        )
+
+        self.market_value = quantity * price
+        self.cost_basis = quantity * avg_cost
+        self.unrealized_pl = self.market_value - self.cost_basis
+        self.unrealized_pl_percent = np.divide(
+            self.unrealized_pl * 100,
+            self.cost_basis,
+            out=np.zeros_like(self.unrealized_pl),
+            where=self.cost_basis > 0,
+        )
+
+        self.total_value = float(self.market_value.sum())
+        self.total_cost = float(self.cost_basis.sum())
+        self.total_pl = self.total_value - self.total_cost
+        self.total_pl_percent = (self.total_pl / self.total_cost) * 100 if self.total_cost > 0 else 0.0
+
+        self.weights = (
+            self.market_value / self.total_value if self.total_value > 0 else np.zeros_like(self.market_value)
+        )
+        self.sector_values = np.bincount(
+            self.sector_codes, weights=self.market_value, minlength=len(self.sector_names)
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def sector_allocation(self) -> Dict[str, float]:
+        """Percent of market value per sector, largest first."""
+        if self.total_value <= 0:
+            return {}
+        percents = self.sector_values / self.total_value * 100
+        order = np.argsort(-percents)
+        return {str(self.sector_names[i]): round(float(percents[i]), 2) for i in order}
+
+
+class ValuationService:
+    def value_holdings(
+        self,
+        holdings: List[Mapping[str, Any]],
+        quotes: Mapping[str, StockQuote],
+    ) -> PortfolioValuation:
+        """
+        Values holdings dicts/rows (symbol, quantity, avg_cost, sector) at the
+        given quotes. Symbols without a quote are valued at cost.
+        """
+        count = len(holdings)
+        symbols = [h["symbol"] for h in holdings]
+        quantity = np.fromiter((h["quantity"] for h in holdings), dtype=np.float64, count=count)
+        avg_cost = np.fromiter((h["avg_cost"] for h in holdings), dtype=np.float64, count=count)
+        price = np.fromiter(
+            (quotes[s].price if s in quotes else np.nan for s in symbols), dtype=np.float64, count=count
+        )
+        price = np.where(np.isnan(price), avg_cost, price)
+
+        return PortfolioValuation(
+            symbols=symbols,
+            sectors=[h.get("sector") for h in holdings],
+            quantity=quantity,
+            avg_cost=avg_cost,
+            price=price,
+        )
+
+
+valuation_service = ValuationService()
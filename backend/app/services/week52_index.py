@@ -0,0 +1,153 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from cachetools import LRUCache
+from app.config import get_settings
+from app.database import ReadSessionLocal
+from app.models import PriceRollup
+
+settings = get_settings()
+
+# Calendar days in a 52-week range
+WINDOW_DAYS = 365
+# Symbols per history query, under SQLite's bound-parameter limit
+SYMBOL_CHUNK = 500
+
+
+class RollingExtrema:
+    """
+    Low and high over a sliding window of daily bars.
+
+    Two monotonic deques of (day, value): highs are decreasing and lows
+    increasing from the front, so each front is the window's extreme. A
+    bar is appended and evicted at most once, so push() is O(1) amortized
+    and a range query is O(1) once expired days are dropped. Pushing the
+    same day again (today's bar moving intraday) just widens that day.
+    """
+    __slots__ = ("window", "_highs", "_lows")
+
+    def __init__(self, window: int = WINDOW_DAYS):
+        self.window = window
+        self._highs: Deque[Tuple[int, float]] = deque()
+        self._lows: Deque[Tuple[int, float]] = deque()
+
+    def push(self, day: int, high: float, low: float) -> None:
+        """Add a bar for `day` (a date ordinal, never older than the last push)."""
+        highs, lows = self._highs, self._lows
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((day, high))
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((day, low))
+        self._expire(day)
+
+    def range(self, day: int) -> Optional[Tuple[float, float]]:
+        """(low, high) over the window ending on `day`, or None with no bars in it."""
+        self._expire(day)
+        if not self._highs:
+            return None
+        return self._lows[0][1], self._highs[0][1]
+
+    def _expire(self, day: int) -> None:
+        oldest = day - self.window
+        while self._highs and self._highs[0][0] <= oldest:
+            self._highs.popleft()
+        while self._lows and self._lows[0][0] <= oldest:
+            self._lows.popleft()
+
+
+class Week52Index:
+    """
+    52-week low/high per symbol, kept current tick by tick.
+
+    A symbol's window is seeded once from its stored 1d bars (many symbols
+    per query); after that every quote tick is pushed into it, so range
+    lookups never touch the database or Finnhub's candle endpoint. At most
+    WEEK52_INDEX_MAXSIZE windows are kept; the least recently used is
+    dropped and re-seeded if asked for again.
+    """
+
+    def __init__(self, window_days: int = WINDOW_DAYS, maxsize: Optional[int] = None):
+        self.window_days = window_days
+        self._extrema: LRUCache = LRUCache(maxsize=maxsize or settings.WEEK52_INDEX_MAXSIZE)
+        # Ticks for symbols whose window is being seeded, replayed once it's loaded
+        self._pending: Dict[str, List[Tuple[int, float, float]]] = {}
+
+    def record(self, symbol: str, high: float, low: float, at: Optional[datetime] = None) -> None:
+        """
+        Fold today's high/low from a quote into `symbol`'s window if it's been
+        loaded, or hold it for a window that's loading; other symbols pick the
+        tick up from stored bars later.
+        """
+        day = (at or datetime.utcnow()).toordinal()
+        extrema = self._extrema.get(symbol)
+        if extrema is not None:
+            extrema.push(day, high, low)
+        elif symbol in self._pending:
+            self._pending[symbol].append((day, high, low))
+
+    def peek(self, symbol: str, at: Optional[datetime] = None) -> Optional[Tuple[float, float]]:
+        """(low, high) for a loaded symbol, without loading anything."""
+        extrema = self._extrema.get(symbol)
+        if extrema is None:
+            return None
+        return extrema.range((at or datetime.utcnow()).toordinal())
+
+    async def get_ranges(self, symbols: List[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """(low, high) per symbol, None where there's no history yet. Unloaded symbols are seeded in bulk."""
+        now = datetime.utcnow()
+        day = now.toordinal()
+        ranges: Dict[str, Optional[Tuple[float, float]]] = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            extrema = self._extrema.get(symbol)
+            if extrema is None:
+                missing.append(symbol)
+            else:
+                ranges[symbol] = extrema.range(day)
+        if missing:
+            for symbol in missing:
+                self._pending.setdefault(symbol, [])
+            try:
+                loaded = await asyncio.to_thread(self._load, missing)
+            finally:
+                pending = {s: self._pending.pop(s, []) for s in missing}
+            for symbol, extrema in loaded.items():
+                # A concurrent load may have won; its window already has the ticks since
+                current = self._extrema.get(symbol)
+                if current is None:
+                    for tick in pending[symbol]:
+                        extrema.push(*tick)
+                    self._extrema[symbol] = current = extrema
+                ranges[symbol] = current.range(day)
+        return {s: ranges[s] for s in symbols}
+
+    async def get_range(self, symbol: str) -> Optional[Tuple[float, float]]:
+        return (await self.get_ranges([symbol]))[symbol]
+
+    def _load(self, symbols: Iterable[str]) -> Dict[str, RollingExtrema]:
+        symbols = list(symbols)
+        since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=self.window_days)
+        loaded = {s: RollingExtrema(self.window_days) for s in symbols}
+        db = ReadSessionLocal()
+        try:
+            for start in range(0, len(symbols), SYMBOL_CHUNK):
+                rows = (
+                    db.query(PriceRollup.symbol, PriceRollup.bucket_start, PriceRollup.high, PriceRollup.low)
+                    .filter(
+                        PriceRollup.resolution == "1d",
+                        PriceRollup.bucket_start > since,
+                        PriceRollup.symbol.in_(symbols[start:start + SYMBOL_CHUNK]),
+                    )
+                    .order_by(PriceRollup.bucket_start)
+                )
+                for symbol, day, high, low in rows:
+                    loaded[symbol].push(day.toordinal(), high, low)
+        finally:
+            db.close()
+        return loaded
+
+
+week52_index = Week52Index()
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class RateLimitTimeout(Exception):
+    """No token could be had within the caller's timeout."""
+
+
+class TokenBucket:
+    """
+    Async token bucket used to stay under an upstream request quota.
+    Callers wait in FIFO order for a token instead of being rejected, so
+    bursts are smoothed out rather than turned into 429s.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        if rate_per_minute <= 0:
+            raise ValueError(f"rate_per_minute must be positive, got {rate_per_minute}")
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a token. With `timeout`, raises RateLimitTimeout as soon as
+        the wait (queueing behind earlier callers included) would exceed it.
+        """
+        if timeout is None:
+            await self._acquire(None)
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            await asyncio.wait_for(self._acquire(deadline), timeout)
+        except asyncio.TimeoutError:
+            raise RateLimitTimeout(f"No rate limit token within {timeout:.1f}s") from None
+
+    async def _acquire(self, deadline: Optional[float]) -> None:
+        # Holding the lock while sleeping keeps waiters strictly first-come first-served
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+
+                if deadline is not None and now + wait > deadline:
+                    raise RateLimitTimeout(f"Next rate limit token in {wait:.1f}s")
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for `seconds`, e.g. after the provider returns
+        429. One token is ready when the pause ends; the rest refill at the rate.
+        """
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = min(1.0, float(self.capacity))
+        self._updated = self._paused_until
@@ -1,18 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import jwt
 from app.config import get_settings
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max pinned to the configured cost so hashes made at any other cost
+# are flagged by needs_update and upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt is deliberately slow and releases the GIL, so it runs in its own
+# bounded pool: a login burst queues here instead of stalling the event loop
+# or starving the default executor used by asyncio.to_thread
+_hash_executor: Optional[ThreadPoolExecutor] = None
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def _run_hasher(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), func, *args)
+
+
+async def verify_password(plain_password, hashed_password):
+    return await _run_hasher(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash should be replaced."""
+    return await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password):
+    return await _run_hasher(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Per-user holdings read latency as the holdings table grows.
+
+    cd backend && python benchmarks/bench_holdings_queries.py [--sizes 10000 100000 1000000]
+
+For each table size, a scratch SQLite database is migrated to the baseline
+schema (no per-user index) and then to head, and the two hot per-user
+queries (the valuation read and the sync diff read) are timed for a sample of
+users. The report shows statements per read, median/p95 latency and the
+query plan. With the head indexes, latency should stay flat as rows grow.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import event, select, text  # noqa: E402
+from app.database import ALEMBIC_INI, BASELINE_REVISION, create_db_engine  # noqa: E402
+from app.models import Holding  # noqa: E402
+
+HOLDINGS_PER_USER = 25
+SYMBOLS = [f"S{n:04d}" for n in range(2000)]
+SAMPLE_USERS = 200
+
+QUERIES = {
+    "valuation": lambda user_id: select(Holding.symbol, Holding.quantity, Holding.avg_cost, Holding.sector)
+    .where(Holding.user_id == user_id),
+    "sync diff": lambda user_id: select(Holding).where(Holding.user_id == user_id),
+}
+
+
+def _migrate(engine, revision: str) -> None:
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def _populate(engine, rows: int) -> int:
+    users = max(1, rows // HOLDINGS_PER_USER)
+    rng = random.Random(rows)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO users (id, email, hashed_password, is_active) VALUES (:id, :email, 'x', 1)"),
+            [{"id": u, "email": f"user{u}@example.com"} for u in range(1, users + 1)],
+        )
+        batch = []
+        for user_id in range(1, users + 1):
+            for symbol in rng.sample(SYMBOLS, HOLDINGS_PER_USER):
+                batch.append({
+                    "user_id": user_id, "symbol": symbol, "quantity": rng.randint(1, 500),
+                    "avg_cost": round(rng.uniform(1, 500), 2), "sector": "Technology",
+                })
+            if len(batch) >= 50_000:
+                connection.execute(text(
+                    "INSERT INTO holdings (user_id, symbol, quantity, avg_cost, sector) "
+                    "VALUES (:user_id, :symbol, :quantity, :avg_cost, :sector)"
+                ), batch)
+                batch = []
+        if batch:
+            connection.execute(text(
+                "INSERT INTO holdings (user_id, symbol, quantity, avg_cost, sector) "
+                "VALUES (:user_id, :symbol, :quantity, :avg_cost, :sector)"
+            ), batch)
+    return users
+
+
+def _measure(engine, users: int, label: str, rows: int) -> None:
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    sample = random.Random(0).sample(range(1, users + 1), min(SAMPLE_USERS, users))
+    try:
+        with engine.connect() as connection:
+            for name, build in QUERIES.items():
+                timings = []
+                statements.clear()
+                for user_id in sample:
+                    start = time.perf_counter()
+                    result = connection.execute(build(user_id)).all()
+                    timings.append((time.perf_counter() - start) * 1000)
+                    assert len(result) == HOLDINGS_PER_USER
+                per_read = len(statements) / len(sample)
+                timings.sort()
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                compiled = build(sample[0]).compile(engine, compile_kwargs={"literal_binds": True})
+                plan = " | ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+                print(f"{label:8} {rows:>10,} {name:10} {per_read:5.1f} {statistics.median(timings):9.3f} {p95:9.3f}  {plan}")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'schema':8} {'rows':>10} {'query':10} {'stmts':>5} {'p50 ms':>9} {'p95 ms':>9}  plan")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            path = os.path.join(directory, f"holdings_{rows}.db")
+            engine = create_db_engine(f"sqlite:///{path}")
+            try:
+                _migrate(engine, BASELINE_REVISION)
+                users = _populate(engine, rows)
+                _measure(engine, users, "baseline", rows)
+                _migrate(engine, "head")
+                _measure(engine, users, "head", rows)
+            finally:
+                engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Login throughput for sizing PASSWORD_HASH_WORKERS and BCRYPT_ROUNDS.
+
+    cd backend && python benchmarks/bench_login.py [--rounds 12] [--workers 4] [--logins 200] [--concurrency 50]
+
+Runs the real /api/auth/login route in-process against a scratch SQLite
+database, firing `--logins` logins with up to `--concurrency` in flight,
+while a probe keeps hitting GET / to show how responsive the event loop
+stays during the burst. Also runs one pass with hashes at a different cost
+to measure rehash-on-login.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+async def _burst(client, users, logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def login(n):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/auth/login", data={"username": users[n % len(users)], "password": "benchmark"})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/")
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(n) for n in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return elapsed, latencies, probe_latencies
+
+
+async def _run(args):
+    import httpx
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.main import app
+    from app.models import User
+    from app.services.auth_service import create_user
+    from app.utils import security
+
+    users = [f"bench{n}@example.com" for n in range(args.users)]
+    async with AsyncSessionLocal() as db:
+        for email in users:
+            await create_user(db, email, "benchmark")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"bcrypt rounds={args.rounds} workers={args.workers} logins={args.logins} concurrency={args.concurrency}")
+        for label in ("steady", "rehash"):
+            if label == "rehash":
+                # Store hashes at a lower cost so every first login upgrades one
+                async with AsyncSessionLocal() as db:
+                    old = security.CryptContext(schemes=["bcrypt"], bcrypt__rounds=max(4, args.rounds - 2))
+                    for user in (await db.execute(select(User))).scalars():
+                        user.hashed_password = old.hash("benchmark")
+                    await db.commit()
+            elapsed, latencies, probe = await _burst(client, users, args.logins, args.concurrency)
+            print(
+                f"{label:7} {args.logins / elapsed:7.1f} logins/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {_percentile(latencies, 0.95) * 1000:7.1f} ms  "
+                f"| GET / during burst p95 {_percentile(probe, 0.95) * 1000:6.1f} ms (max {max(probe) * 1000:.1f} ms)"
+            )
+    security.shutdown_hash_executor()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read once at import, so configure before importing the app
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+        os.environ["PRICE_REFRESH_ENABLED"] = "false"
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Statement parser throughput on the synthetic corpus.
+
+    cd backend && python benchmarks/bench_statement_parse.py [--repeat N]
+
+Reports pages/sec per statement and checks every expected holding was
+found with the right quantity and cost basis.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.statement_corpus import build_corpus  # noqa: E402
+from app.services.pdf_service import pdf_service, scan_statement  # noqa: E402
+import pypdfium2  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = build_corpus(directory)
+        print(f"{'statement':32} {'pages':>5} {'rows':>5} {'best s':>8} {'pages/s':>8}  ok")
+        for path, expected in corpus:
+            page_count = len(pypdfium2.PdfDocument(path))
+            best = float("inf")
+            holdings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                holdings = pdf_service._extract_holdings(path)
+                best = min(best, time.perf_counter() - start)
+
+            found = [(h["symbol"], h["quantity"], round(h["avg_cost"] * h["quantity"], -1)) for h in holdings]
+            wanted = [(e["symbol"], e["quantity"], round(e["cost_basis"], -1)) for e in expected]
+            ok = len(found) == len(wanted) and all(
+                f[0] == w[0] and f[1] == w[1] and abs(f[2] - w[2]) <= max(10.0, w[2] * 0.01)
+                for f, w in zip(found, wanted)
+            )
+            print(f"{os.path.basename(path):32} {page_count:5d} {len(holdings):5d} {best:8.3f} "
+                  f"{page_count / best:8.1f}  {'yes' if ok else 'NO'}")
+            assert scan_statement(path).broker == "fidelity"
+    pdf_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Synthetic Fidelity-style statements for parser benchmarks.
+
+Cells are placed at fixed x positions like a real statement, so the
+geometry parser sees proper columns. Some descriptions wrap above their
+numbers and some symbols wrap onto the line below, to exercise row
+assembly. Every statement also carries disclosure pages that the
+pre-scan should skip.
+"""
+import os
+import random
+import textwrap
+from typing import List, Tuple
+
+# x positions of: description, beginning value, quantity, price, ending value, cost basis, gain/loss
+COLUMNS = [40, 250, 310, 360, 410, 470, 530]
+LINE_HEIGHT = 11
+# Characters of 8pt Helvetica that fit before the first numeric column
+DESCRIPTION_WIDTH = 38
+ROWS_PER_PAGE = 55
+
+SYMBOLS = [
+    ("IONQ", "IONQ INC COM"), ("NVDA", "NVIDIA CORPORATION COM"), ("AMD", "ADVANCED MICRO DEVICES INC"),
+    ("GOOG", "ALPHABET INC CAP STK CL C"), ("URA", "GLOBAL X FDS GLOBAL X URANIUM ETF"),
+    ("SCHD", "SCHWAB STRATEGIC TR US DIVIDEND EQUITY ETF"), ("TSLA", "TESLA INC COM"),
+    ("MRNY", "TIDAL TRUST II YIELDMAX MRNA OPTION INCOME STRATEGY ETF"), ("SOFI", "SOFI TECHNOLOGIES INC COM"),
+    ("MO", "ALTRIA GROUP INC COM"), ("JNJ", "JOHNSON & JOHNSON COM"), ("ORC", "ORCHID IS CAP INC COM"),
+]
+
+Cell = Tuple[float, float, str]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _holding_rows(rng: random.Random, count: int) -> Tuple[List[List[Tuple[int, str]]], List[dict]]:
+    """Lines of (column, text) cells plus the rows the parser should find."""
+    lines: List[List[Tuple[int, str]]] = []
+    expected = []
+    for _ in range(count):
+        symbol, name = rng.choice(SYMBOLS)
+        quantity = rng.randint(1, 500)
+        price = round(rng.uniform(2, 600), 4)
+        cost_basis = round(quantity * price * rng.uniform(0.4, 1.3), 2)
+        ending = round(quantity * price, 2)
+        numbers = [
+            f"{ending * 0.97:,.2f}", f"{quantity:.3f}", f"{price:.4f}",
+            f"{ending:,.2f}", f"{cost_basis:,.2f}", f"{ending - cost_basis:,.2f}",
+        ]
+        number_cells = list(zip(range(1, 7), numbers))
+        # Descriptions wrap within their column, like the real statement
+        chunks = textwrap.wrap(f"{name} ({symbol})", DESCRIPTION_WIDTH)
+        if len(chunks) == 1:
+            lines.append([(0, chunks[0])] + number_cells)
+        elif rng.random() < 0.5:
+            # Wrapped lines above the one carrying the symbol and numbers
+            lines.extend([(0, chunk)] for chunk in chunks[:-1])
+            lines.append([(0, chunks[-1])] + number_cells)
+        else:
+            # Numbers on the first line, symbol wrapped below them
+            lines.append([(0, chunks[0])] + number_cells)
+            lines.extend([(0, chunk)] for chunk in chunks[1:])
+        expected.append({"symbol": symbol, "quantity": float(quantity), "cost_basis": cost_basis})
+    return lines, expected
+
+
+def _page_content(cells: List[Cell]) -> bytes:
+    ops = ["BT /F1 8 Tf"]
+    for x, y, text in cells:
+        ops.append(f"1 0 0 1 {x} {y} Tm ({_escape(text)}) Tj")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def _write_pdf(path: str, pages: List[List[Cell]]) -> None:
+    objects: List[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_id = 2 + 2 * len(pages)
+    page_ids = []
+    for cells in pages:
+        content = _page_content(cells)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 1 0 R >> >> >>" % (pages_id, len(objects))
+        )
+        page_ids.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_statement(path: str, holdings_pages: int, disclosure_pages: int, seed: int = 0) -> List[dict]:
+    """Write one statement; returns the holdings it contains."""
+    rng = random.Random(seed)
+    pages: List[List[Cell]] = [[
+        (40, 740, "Fidelity Investments"),
+        (40, 720, "INVESTMENT REPORT October 1, 2025 - October 31, 2025"),
+    ]]
+    expected = []
+    for _ in range(holdings_pages):
+        lines, rows = _holding_rows(rng, ROWS_PER_PAGE // 2)
+        expected.extend(rows)
+        cells: List[Cell] = [(40, 760, "Holdings"), (40, 745, "Stocks")]
+        header = ["Description", "Beginning", "Quantity", "Price", "Ending", "Cost Basis", "Gain/Loss"]
+        cells.extend((COLUMNS[i], 732, text) for i, text in enumerate(header))
+        y = 718
+        for line in lines:
+            cells.extend((COLUMNS[column], y, text) for column, text in line)
+            y -= LINE_HEIGHT
+        cells.append((40, y - 4, "Total Stocks"))
+        pages.append(cells)
+    for n in range(disclosure_pages):
+        cells = [(40, 760 - i * LINE_HEIGHT, f"Important information about your account {n}.{i} lorem ipsum")
+                 for i in range(60)]
+        pages.append(cells)
+    _write_pdf(path, pages)
+    return expected
+
+
+def build_corpus(directory: str, sizes: Tuple[Tuple[int, int], ...] = ((1, 2), (4, 8), (10, 30))) -> List[Tuple[str, List[dict]]]:
+    """(path, expected holdings) for one statement per (holdings pages, disclosure pages) size."""
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for seed, (holdings_pages, disclosure_pages) in enumerate(sizes):
+        path = os.path.join(directory, f"statement_{holdings_pages}h_{disclosure_pages}d.pdf")
+        corpus.append((path, make_statement(path, holdings_pages, disclosure_pages, seed)))
+    return corpus